@@ -1,19 +1,36 @@
-from flask import Flask, render_template, request, redirect, url_for, session, jsonify
+from flask import Flask, render_template, request, redirect, url_for, session, jsonify, g, Response
 import os
+import time
 import joblib
 import sqlite3
 from datetime import datetime
-import easyocr
 import whisper
 import csv
 from dotenv import load_dotenv
+from artifact import load_artifact, artifact_mtime
+from prediction_cache import PredictionCache
+import audio_preprocess
+import image_preprocess
+from ocr_readers import ReaderPool
+from ocr_service import ocr_remote, OcrServiceUnavailable
+from stats import init_stats, query_stats
+from search import init_search, search_complaints
+import metrics
+from metrics import stage
+import bulk_ingest
+from users import init_users, upsert_user, user_cache
+from server_session import ServerSessionInterface, make_store
+import archive
+from priority import assess_priority, hint_priority, backfill_priority, scheduler, notify_department, QueueFull
+from hotspots import hotspot_index
 
 # -----------------------------
 # Load environment variables
 # -----------------------------
 load_dotenv()  # reads .env file
 
-app = Flask(__name__)
+# The folder is committed as "Templates"; say so for case-sensitive filesystems
+app = Flask(__name__, template_folder="Templates")
 app.secret_key = os.getenv("FLASK_SECRET", "super_secret_key")  # default secret
 
 # Fixed admin credentials
@@ -26,8 +43,10 @@ os.makedirs("static/recordings", exist_ok=True)
 
 # Absolute paths for DB & CSV
 BASE_DIR = os.path.abspath(os.path.dirname(__file__))
-DB_PATH = os.path.join(BASE_DIR, "grievance.db")
-CSV_PATH = os.path.join(BASE_DIR, "complaints.csv")
+# Overridable so load tests / CI can run against a scratch copy
+DB_PATH = os.getenv("GRIEVANCE_DB", os.path.join(BASE_DIR, "grievance.db"))
+CSV_PATH = os.getenv("GRIEVANCE_CSV", os.path.join(BASE_DIR, "complaints.csv"))
+SESSION_DB_PATH = os.getenv("GRIEVANCE_SESSION_DB", os.path.join(BASE_DIR, "sessions.db"))
 
 print("📂 Database path:", DB_PATH)
 print("📄 CSV path:", CSV_PATH)
@@ -59,28 +78,124 @@ def init_db():
             complaint_text TEXT,
             department TEXT,
             timestamp TEXT,
+            priority TEXT,
             FOREIGN KEY (user_id) REFERENCES users(id)
         )
     ''')
+    # Databases created before complaints had a priority
+    columns = [row[1] for row in c.execute("PRAGMA table_info(complaints)")]
+    if 'priority' not in columns:
+        c.execute("ALTER TABLE complaints ADD COLUMN priority TEXT")
+        backfill_priority(conn)
     conn.commit()
+    # Department/village/priority/day rollups maintained by triggers
+    init_stats(conn)
+    # FTS5 index over complaint_text maintained by triggers
+    init_search(conn)
+    # Unique (name, mobile) index for the login upsert
+    init_users(conn)
+    # Registry of monthly archive databases (archive.py)
+    archive.init_archive(conn)
+    # Last day of complaints into the in-memory hotspot index
+    hotspot_index.sync(conn, force=True)
     conn.close()
 
 init_db()
 
+# Optional in-process archival + VACUUM; `python archive.py` from cron works too
+if os.getenv("ARCHIVE_INTERVAL_HOURS"):
+    archive.start_scheduler(DB_PATH, float(os.getenv("ARCHIVE_INTERVAL_HOURS")))
+
+# Server-side sessions: the cookie only holds a random session id
+app.session_interface = ServerSessionInterface(
+    make_store(os.getenv("REDIS_URL"), SESSION_DB_PATH))
+
 # -----------------------------
 # Load AI Model + Vectorizer
 # -----------------------------
 model_path = os.path.join(BASE_DIR, "model/grievance_model.pkl")
 vectorizer_path = os.path.join(BASE_DIR, "model/vectorizer.pkl")
-model = joblib.load(model_path)
-vectorizer = joblib.load(vectorizer_path)
+
+# Prefer the memory-mapped artifact (pages shared across workers, no sklearn
+# at serve time); fall back to the joblib pickles if it hasn't been exported.
+classifier = load_artifact()
+if classifier is None:
+    model = joblib.load(model_path)
+    vectorizer = joblib.load(vectorizer_path)
+    model_version = "pkl-%d" % int(os.path.getmtime(model_path))
+    print("⚠️ Model artifact not found, using joblib pickles (run artifact.py to export)")
+else:
+    model_version = classifier.version
+    print("📦 Model artifact loaded:", classifier.version)
+
+prediction_cache = PredictionCache(model_version, redis_url=os.getenv("REDIS_URL"))
+_manifest_mtime = artifact_mtime()
+
+def reload_model_if_changed():
+    """Pick up a re-exported artifact; the cache is re-scoped to the new version."""
+    global classifier, _manifest_mtime
+    mtime = artifact_mtime()
+    if mtime == _manifest_mtime:
+        return
+    _manifest_mtime = mtime
+    new_classifier = load_artifact()
+    if new_classifier is not None:
+        classifier = new_classifier
+        prediction_cache.set_version(classifier.version)
+        print("🔄 Model artifact reloaded:", classifier.version)
+
+@metrics.timed("model")
+def _classify_uncached(text):
+    if classifier is not None:
+        probs = classifier.predict_proba([text])[0]
+        labels = classifier.classes
+    else:
+        probs = model.predict_proba(vectorizer.transform([text]))[0]
+        labels = model.classes_
+    probabilities = {str(label): round(float(p), 4) for label, p in zip(labels, probs)}
+    department = max(probabilities, key=probabilities.get)
+    return department, probabilities
+
+def classify_batch(texts):
+    """Departments for many texts in one vectorized call (bulk ingestion)."""
+    reload_model_if_changed()
+    with stage("classify_batch"):
+        if classifier is not None:
+            return [str(d) for d in classifier.predict(texts)]
+        return [str(d) for d in model.predict(vectorizer.transform(texts))]
+
+def classify(text):
+    """Return (department, {department: probability}) for a complaint text."""
+    reload_model_if_changed()
+    with stage("classify"):
+        return prediction_cache.get_or_compute(text, _classify_uncached)
 
 # -----------------------------
 # OCR + Whisper
 # -----------------------------
-reader = easyocr.Reader(['en'])
+# English / Marathi recognizers share one detector and load on first use.
+# With OCR_SERVICE_ADDRESS set they live in the shared `python ocr_service.py`
+# process instead of in every worker.
+OCR_SERVICE_ADDRESS = os.getenv("OCR_SERVICE_ADDRESS", "")
+ocr_pool = None if OCR_SERVICE_ADDRESS else ReaderPool()
+
+def run_ocr(paths, hint=None):
+    """(texts, scripts) for one submission's images."""
+    if OCR_SERVICE_ADDRESS:
+        return ocr_remote(paths, hint=hint, address=OCR_SERVICE_ADDRESS)
+    return image_preprocess.ocr_images(ocr_pool, paths, hint=hint)
+
 whisper_model = whisper.load_model("tiny")
 
+# -----------------------------
+# Helper: Language of a text complaint
+# -----------------------------
+def guess_language(text):
+    """'mr' if the text is mostly Devanagari, else 'en'."""
+    letters = [ch for ch in text if ch.isalpha()]
+    devanagari = sum(1 for ch in letters if '\u0900' <= ch <= '\u097f')
+    return 'mr' if letters and devanagari * 2 >= len(letters) else 'en'
+
 # -----------------------------
 # Helper: Save to CSV
 # -----------------------------
@@ -93,6 +208,47 @@ def save_to_csv(full_name, mobile, village, pincode, aadhar, complaint, departme
         writer.writerow([full_name, mobile, village, pincode, aadhar, complaint, department, timestamp])
     print(f"📝 Complaint saved in CSV: {full_name} → {department}")
 
+# -----------------------------
+# Request instrumentation
+# -----------------------------
+metrics.register_gauge("grievance_prediction_cache_hit_rate", "Prediction cache hit rate.",
+                       lambda: prediction_cache.stats()["hit_rate"])
+metrics.register_gauge("grievance_prediction_cache_saved_seconds",
+                       "Estimated classifier time saved by cache hits.",
+                       lambda: prediction_cache.saved_seconds)
+
+@app.before_request
+def start_request_timer():
+    g.request_start = time.perf_counter()
+    g.profiler = None
+    if metrics.should_profile(request.headers.get("X-Profile")):
+        g.profiler = metrics.RequestProfiler()
+        g.profiler.start()
+
+@app.after_request
+def record_request_time(response):
+    endpoint = request.endpoint or "unknown"
+    if getattr(g, "profiler", None) is not None:
+        path = g.profiler.stop(endpoint)
+        g.profiler = None
+        response.headers["X-Profile-Report"] = os.path.basename(path)
+        print(f"🧪 Profile for {request.path} written to {path}")
+    if hasattr(g, "request_start"):
+        metrics.REQUEST_SECONDS.observe(endpoint, time.perf_counter() - g.request_start)
+    return response
+
+@app.teardown_request
+def stop_profiler(exc):
+    # after_request is skipped when a view raises; never leave the profiler running
+    if getattr(g, "profiler", None) is not None:
+        path = g.profiler.stop(request.endpoint or "unknown")
+        g.profiler = None
+        print(f"🧪 Profile for failed {request.path} written to {path}")
+
+@app.route('/metrics')
+def prometheus_metrics():
+    return Response(metrics.render_metrics(), mimetype="text/plain; version=0.0.4")
+
 # -----------------------------
 # Routes
 # -----------------------------
@@ -108,6 +264,7 @@ def do_login():
 
     # --- Admin login ---
     if name == ADMIN_USERNAME and password == ADMIN_PASSWORD:
+        session.rotate()
         session['user_id'] = 0
         session['username'] = "Admin"
         session['role'] = "admin"
@@ -117,20 +274,14 @@ def do_login():
     if not name or not mobile:
         return "Name and Mobile are required!"
 
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute("SELECT id FROM users WHERE name=? AND mobile=?", (name, mobile))
-    user = c.fetchone()
-
-    if user:
-        user_id = user[0]
-    else:
-        c.execute("INSERT INTO users (name, mobile, role) VALUES (?, ?, 'user')", (name, mobile))
-        conn.commit()
-        user_id = c.lastrowid
-
-    conn.close()
+    # Cached (name, mobile) -> id; a miss is a single upsert
+    user_id = user_cache.get((name, mobile))
+    if user_id is None:
+        conn = sqlite3.connect(DB_PATH)
+        user_id = upsert_user(conn, name, mobile)
+        conn.close()
 
+    session.rotate()
     session['user_id'] = user_id
     session['username'] = name
     session['role'] = 'user'
@@ -143,6 +294,12 @@ def index():
         return redirect(url_for('login'))
     return render_template('index.html', username=session['username'])
 
+# OCR / Whisper backlog is full or the OCR service is down: shed the request
+@app.errorhandler(QueueFull)
+@app.errorhandler(OcrServiceUnavailable)
+def scheduler_busy(e):
+    return jsonify({"error": "Server busy, please retry shortly"}), 503, {"Retry-After": "30"}
+
 @app.route('/predict', methods=['POST'])
 def predict():
     if 'user_id' not in session or session.get('role') != 'user':
@@ -153,6 +310,8 @@ def predict():
     village = request.form.get("village", "")
     pincode = request.form.get("pincode", "")
     aadhar = request.form.get("aadhar", "")
+    # OCR / Whisper run before classification, so they are queued by the optional issue type
+    provisional = hint_priority(request.form.get("category"))
 
     extracted_text = ""
     department = ""
@@ -160,56 +319,95 @@ def predict():
     # --- Text input ---
     if 'complaint' in request.form and request.form['complaint'].strip():
         extracted_text = request.form['complaint'].strip()
+        session['lang'] = guess_language(extracted_text)
 
     # --- Image input ---
     elif 'image' in request.files:
-        image_file = request.files['image']
-        if image_file and image_file.filename:
-            image_path = os.path.join("static/uploads", image_file.filename)
-            image_file.save(image_path)
-            result = reader.readtext(image_path, detail=0)
-            extracted_text = " ".join(result)
+        image_paths = []
+        for image_file in request.files.getlist('image'):
+            if image_file and image_file.filename:
+                image_path = os.path.join("static/uploads", image_file.filename)
+                with stage("upload_save"):
+                    image_file.save(image_path)
+                image_paths.append(image_path)
+        if image_paths:
+            # Downscaled, cropped pages of one submission, batched per script
+            hint = request.form.get("lang") or session.get("lang")
+            with stage("ocr"):
+                texts, scripts = scheduler.run(provisional, run_ocr, image_paths, hint=hint)
+            extracted_text = " ".join(texts)
+            session['lang'] = max(set(scripts), key=scripts.count)
 
     # --- Audio input ---
     elif 'audio' in request.files:
         audio_file = request.files['audio']
         if audio_file and audio_file.filename:
             audio_path = os.path.join("static/recordings", audio_file.filename)
-            audio_file.save(audio_path)
-            result = whisper_model.transcribe(audio_path)
+            with stage("upload_save"):
+                audio_file.save(audio_path)
+            # Language hint from the form or this user's previous complaints
+            language = request.form.get("lang") or session.get("lang")
+            with stage("transcribe"):
+                result = scheduler.run(provisional, audio_preprocess.transcribe,
+                                       whisper_model, audio_path, language=language)
             extracted_text = result["text"]
+            if result["language"]:
+                session['lang'] = result["language"]
 
     if extracted_text.strip():
-        text_vec = vectorizer.transform([extracted_text])
-        department = model.predict(text_vec)[0]
+        department, _ = classify(extracted_text)
     else:
         extracted_text = "No complaint text provided."
         department = "Unknown"
+    priority = assess_priority(department, extracted_text)
 
     timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
 
     # --- Save to DB ---
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute("""
-        INSERT INTO complaints (user_id, full_name, village, pincode, aadhar, complaint_text, department, timestamp)
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-    """, (session['user_id'], full_name, village, pincode, aadhar, extracted_text, department, timestamp))
-    conn.commit()
-    conn.close()
-    print(f"✅ Complaint saved to DB: {extracted_text[:60]} → {department}")
+    with stage("db_insert"):
+        conn = sqlite3.connect(DB_PATH)
+        c = conn.cursor()
+        c.execute("""
+            INSERT INTO complaints (user_id, full_name, village, pincode, aadhar, complaint_text, department, timestamp, priority)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, (session['user_id'], full_name, village, pincode, aadhar, extracted_text, department, timestamp, priority))
+        complaint_id = c.lastrowid
+        conn.commit()
+        conn.close()
+    print(f"✅ Complaint saved to DB: {extracted_text[:60]} → {department} ({priority})")
+    hotspot_index.record(pincode, village, department, timestamp, complaint_id=complaint_id)
+
+    # --- Route to the department (queued by priority) ---
+    notify_department(complaint_id, department, priority, village, pincode, extracted_text)
 
     # --- Save to CSV ---
-    save_to_csv(full_name, session['mobile'], village, pincode, aadhar, extracted_text, department, timestamp)
+    with stage("csv_append"):
+        save_to_csv(full_name, session['mobile'], village, pincode, aadhar, extracted_text, department, timestamp)
 
     return render_template('index.html',
                            username=session['username'],
                            complaint=extracted_text,
-                           department=department)
+                           department=department,
+                           priority=priority)
 
 # -----------------------------
 # Admin Dashboard
 # -----------------------------
+def listing_sql(source="complaints", where=()):
+    """Admin complaint listing, newest first, over `source` (a complaints
+    table, possibly `<schema>.complaints`) filtered by the `where` conditions."""
+    clause = f"WHERE {' AND '.join(where)}" if where else ""
+    return f"""
+    SELECT u.name, u.mobile, c.full_name, c.village, c.pincode, c.aadhar,
+           c.complaint_text, c.department, c.timestamp
+    FROM {source} c
+    JOIN users u ON c.user_id = u.id
+    {clause}
+    ORDER BY c.timestamp DESC
+"""
+
+LISTING_TIMESTAMP = 8  # column index of c.timestamp in listing_sql() rows
+
 @app.route('/admin')
 def admin_dashboard():
     if session.get('role') != 'admin':
@@ -217,18 +415,116 @@ def admin_dashboard():
 
     conn = sqlite3.connect(DB_PATH)
     c = conn.cursor()
-    c.execute("""
-        SELECT u.name, u.mobile, c.full_name, c.village, c.pincode, c.aadhar, 
-               c.complaint_text, c.department, c.timestamp
-        FROM complaints c
-        JOIN users u ON c.user_id = u.id
-        ORDER BY c.timestamp DESC
-    """)
+    c.execute(listing_sql())
     complaints = c.fetchall()
     conn.close()
 
     return render_template('admin_dashboard.html', complaints=complaints)
 
+@app.route('/admin/stats')
+def admin_stats():
+    if session.get('role') != 'admin':
+        return redirect(url_for('login'))
+
+    try:
+        days = max(1, int(request.args.get('days', 7)))
+        limit = max(1, int(request.args.get('limit', 10)))
+    except ValueError:
+        return jsonify({"error": "days and limit must be integers"}), 400
+
+    conn = sqlite3.connect(DB_PATH)
+    try:
+        rows = query_stats(conn,
+                           group_by=request.args.get('group_by', 'department'),
+                           days=days,
+                           pincode=request.args.get('pincode'),
+                           village=request.args.get('village'),
+                           department=request.args.get('department'),
+                           limit=limit,
+                           priority=request.args.get('priority'))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    finally:
+        conn.close()
+    return jsonify(rows)
+
+@app.route('/admin/search')
+def admin_search():
+    if session.get('role') != 'admin':
+        return redirect(url_for('login'))
+
+    query = request.args.get('q', '').strip()
+    try:
+        page = max(1, int(request.args.get('page', 1)))
+        per_page = min(100, max(1, int(request.args.get('per_page', 20))))
+    except ValueError:
+        return jsonify({"error": "page and per_page must be integers"}), 400
+
+    conn = sqlite3.connect(DB_PATH)
+    results, total = search_complaints(conn, query,
+                                       department=request.args.get('department'),
+                                       date_from=request.args.get('from'),
+                                       date_to=request.args.get('to'),
+                                       page=page, per_page=per_page)
+    conn.close()
+    return jsonify({"query": query, "total": total, "page": page,
+                    "per_page": per_page, "results": results})
+
+# -----------------------------
+# Bulk ingestion API
+# -----------------------------
+BULK_API_KEY = os.getenv("BULK_API_KEY", "")
+
+@app.route('/api/complaints/bulk', methods=['POST'])
+def bulk_complaints():
+    api_key = request.headers.get("X-API-Key", "")
+    if session.get('role') != 'admin' and not (BULK_API_KEY and api_key == BULK_API_KEY):
+        return jsonify({"error": "admin login or X-API-Key required"}), 401
+
+    # Either a multipart 'file' upload or the raw request body
+    upload = request.files.get('file')
+    if upload:
+        stream, filename = upload.stream, upload.filename or ""
+    else:
+        stream, filename = request.stream, ""
+    fmt = request.args.get('format') or bulk_ingest.detect_format(filename, request.content_type or "")
+
+    conn = sqlite3.connect(DB_PATH)
+    try:
+        summary = bulk_ingest.ingest(conn, bulk_ingest.iter_rows(stream, fmt), classify_batch,
+                                     csv_path=CSV_PATH)
+    finally:
+        conn.close()
+    print(f"📦 Bulk import: {summary['inserted']} inserted, {summary['error_count']} rejected")
+    return jsonify(summary)
+
+@app.route('/admin/hotspots')
+def admin_hotspots():
+    if session.get('role') != 'admin':
+        return redirect(url_for('login'))
+
+    try:
+        limit = min(100, max(1, int(request.args.get('limit', 20))))
+    except ValueError:
+        return jsonify({"error": "limit must be an integer"}), 400
+    level = request.args.get('level')
+    if level not in (None, 'pincode', 'village'):
+        return jsonify({"error": "level must be 'pincode' or 'village'"}), 400
+
+    # Picks up complaints stored by other workers / bulk imports, at most every few seconds
+    conn = sqlite3.connect(DB_PATH)
+    hotspot_index.sync(conn)
+    conn.close()
+    return jsonify({**hotspot_index.window_info(),
+                    "hotspots": hotspot_index.hotspots(department=request.args.get('department'),
+                                                       level=level, limit=limit)})
+
+@app.route('/admin/cache_stats')
+def cache_stats():
+    if session.get('role') != 'admin':
+        return redirect(url_for('login'))
+    return jsonify(prediction_cache.stats())
+
 # -----------------------------
 # Logout
 # -----------------------------
@@ -245,19 +541,39 @@ def view_complaints():
     if session.get('role') != 'admin':
         return redirect(url_for('login'))
 
+    # Optional ?from=YYYY-MM-DD&to=YYYY-MM-DD; archives are read only when the range reaches them
+    date_from = request.args.get('from')
+    date_to = request.args.get('to')
+    if date_from or date_to:
+        return jsonify(list_complaints(date_from, date_to))
+
     conn = sqlite3.connect(DB_PATH)
     c = conn.cursor()
-    c.execute("""
-        SELECT u.name, u.mobile, c.full_name, c.village, c.pincode, c.aadhar, 
-               c.complaint_text, c.department, c.timestamp
-        FROM complaints c
-        JOIN users u ON c.user_id = u.id
-        ORDER BY c.timestamp DESC
-    """)
+    c.execute(listing_sql())
     data = c.fetchall()
     conn.close()
     return jsonify(data)
 
+def list_complaints(date_from=None, date_to=None):
+    """listing_sql() over the hot table plus the archived months in range."""
+    where, params = [], []
+    if date_from:
+        where.append("c.timestamp >= ?")
+        params.append(date_from)
+    if date_to:
+        where.append("c.timestamp <= ?")
+        params.append(date_to + " 23:59:59")
+
+    conn = sqlite3.connect(DB_PATH)
+    data = []
+    try:
+        for source in archive.complaint_sources(conn, date_from, date_to):
+            data += conn.execute(listing_sql(source, where), params).fetchall()
+    finally:
+        conn.close()
+    data.sort(key=lambda row: row[LISTING_TIMESTAMP] or "", reverse=True)
+    return data
+
 # -----------------------------
 # Run App
 # -----------------------------
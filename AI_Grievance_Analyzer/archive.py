@@ -0,0 +1,222 @@
+import os
+import re
+import time
+import sqlite3
+import threading
+from datetime import datetime
+
+# -----------------------------
+# Complaint archival
+# -----------------------------
+# Complaints older than ARCHIVE_AFTER_MONTHS are moved out of the hot
+# `complaints` table into one SQLite file per month under archive/
+# (complaints_YYYY_MM.db), so dashboards, exports and backups of the hot DB
+# stay proportional to recent traffic. The daily rollups keep counting
+# archived rows. complaint_sources() yields the hot table and then only the
+# monthly archives a date range actually touches, attached one at a time.
+BASE_DIR = os.path.abspath(os.path.dirname(__file__))
+ARCHIVE_DIR = os.getenv("ARCHIVE_DIR", os.path.join(BASE_DIR, "archive"))
+ARCHIVE_AFTER_MONTHS = int(os.getenv("ARCHIVE_AFTER_MONTHS", "6"))
+
+ARCHIVE_REGISTRY_SCHEMA = """
+CREATE TABLE IF NOT EXISTS complaint_archives (
+    month TEXT PRIMARY KEY,          -- 'YYYY-MM'
+    path TEXT NOT NULL,
+    rows INTEGER NOT NULL DEFAULT 0,
+    archived_at TEXT NOT NULL
+)
+"""
+
+COMPLAINT_COLUMNS = "id, user_id, full_name, village, pincode, aadhar, complaint_text, department, timestamp, priority"
+
+
+def init_archive(conn):
+    conn.execute(ARCHIVE_REGISTRY_SCHEMA)
+    # Archival, its DELETE and date-range listings all filter on timestamp
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_complaints_timestamp ON complaints (timestamp)")
+    conn.commit()
+
+
+def archive_path(month):
+    return os.path.join(ARCHIVE_DIR, f"complaints_{month.replace('-', '_')}.db")
+
+
+def cutoff_month(months=ARCHIVE_AFTER_MONTHS, today=None):
+    """First month ('YYYY-MM') that stays hot."""
+    today = today or datetime.now()
+    index = today.year * 12 + (today.month - 1) - months
+    return f"{index // 12:04d}-{index % 12 + 1:02d}"
+
+
+def _months_to_archive(conn, before_month):
+    rows = conn.execute("""
+        SELECT DISTINCT substr(timestamp, 1, 7) FROM complaints
+        WHERE timestamp < ? ORDER BY 1
+    """, (before_month + "-01",)).fetchall()
+    return [m for (m,) in rows if re.fullmatch(r"\d{4}-\d{2}", m or "")]
+
+
+def _add_priority_column(conn, schema):
+    """Archives written before complaints had a priority column get one (NULL)."""
+    columns = [row[1] for row in conn.execute(f"PRAGMA {schema}.table_info(complaints)")]
+    if "priority" not in columns:
+        conn.execute(f"ALTER TABLE {schema}.complaints ADD COLUMN priority TEXT")
+
+
+def archive_month(conn, month):
+    """Move one month of complaints into its archive file; returns rows moved."""
+    os.makedirs(ARCHIVE_DIR, exist_ok=True)
+    path = archive_path(month)
+    start, end = month + "-01", month + "-32"  # timestamps are 'YYYY-MM-DD HH:MM:SS'
+
+    conn.execute("ATTACH DATABASE ? AS arch", (path,))
+    try:
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS arch.complaints (
+                id INTEGER PRIMARY KEY,
+                user_id INTEGER,
+                full_name TEXT,
+                village TEXT,
+                pincode TEXT,
+                aadhar TEXT,
+                complaint_text TEXT,
+                department TEXT,
+                timestamp TEXT,
+                priority TEXT
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS arch.idx_archive_timestamp ON complaints (timestamp)")
+        _add_priority_column(conn, "arch")
+
+        # Under WAL a transaction spanning ATTACHed files is atomic per file
+        # only, so copy and commit first, then delete what the archive holds.
+        # A crash in between leaves rows in both places; INSERT OR IGNORE
+        # makes the next run finish the job.
+        with conn:
+            conn.execute(f"""
+                INSERT OR IGNORE INTO arch.complaints ({COMPLAINT_COLUMNS})
+                SELECT {COMPLAINT_COLUMNS} FROM main.complaints
+                WHERE timestamp >= ? AND timestamp < ?
+            """, (start, end))
+
+        # The flag keeps the rollup delete trigger from uncounting these rows
+        with conn:
+            conn.execute("INSERT OR REPLACE INTO maintenance_flags (name, value) VALUES ('archiving', 1)")
+            moved = conn.execute("""
+                DELETE FROM main.complaints
+                WHERE timestamp >= ? AND timestamp < ?
+                  AND id IN (SELECT id FROM arch.complaints)
+            """, (start, end)).rowcount
+            conn.execute("UPDATE maintenance_flags SET value = 0 WHERE name = 'archiving'")
+            conn.execute("""
+                INSERT INTO complaint_archives (month, path, rows, archived_at)
+                SELECT ?, ?, COUNT(*), ? FROM arch.complaints
+                WHERE true
+                ON CONFLICT (month) DO UPDATE SET rows = excluded.rows,
+                                                  archived_at = excluded.archived_at
+            """, (month, path, datetime.now().strftime("%Y-%m-%d %H:%M:%S")))
+    finally:
+        conn.execute("DETACH DATABASE arch")
+    return moved
+
+
+def archive_old_complaints(conn, months=ARCHIVE_AFTER_MONTHS):
+    """Archive every month older than `months`; returns {month: rows moved}."""
+    init_archive(conn)
+    moved = {}
+    for month in _months_to_archive(conn, cutoff_month(months)):
+        moved[month] = archive_month(conn, month)
+        print(f"🗄️ Archived {moved[month]} complaints from {month} → {archive_path(month)}")
+    return moved
+
+
+def compact(conn):
+    """Return free pages to the OS and refresh planner stats (needs no open transaction).
+
+    The first run switches the DB to incremental auto-vacuum, which takes
+    one full VACUUM; later runs only free the pages archival released, so
+    concurrent inserts wait briefly instead of failing on a long exclusive
+    lock.
+    """
+    conn.execute("INSERT INTO complaints_fts (complaints_fts) VALUES ('optimize')")
+    conn.commit()
+    if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:  # 2 = INCREMENTAL
+        conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        conn.execute("VACUUM")
+    else:
+        conn.execute("PRAGMA incremental_vacuum").fetchall()
+    conn.execute("PRAGMA optimize")
+    conn.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchall()
+
+
+# -----------------------------
+# Reading across hot + archived data
+# -----------------------------
+def _archives_for_range(conn, date_from, date_to):
+    sql, params = "SELECT month, path FROM complaint_archives WHERE 1=1", []
+    if date_from:
+        sql += " AND month >= ?"
+        params.append(date_from[:7])
+    if date_to:
+        sql += " AND month <= ?"
+        params.append(date_to[:7])
+    return conn.execute(sql + " ORDER BY month", params).fetchall()
+
+
+def complaint_sources(conn, date_from=None, date_to=None):
+    """Yield `<schema>.complaints` for the hot table, then for each archived
+    month overlapping [date_from, date_to], newest first.
+
+    Archives are attached one at a time and detached once the caller has
+    read from them, so any range works within SQLite's attach limit.
+    """
+    yield "main.complaints"
+    for month, path in reversed(_archives_for_range(conn, date_from, date_to)):
+        conn.execute("ATTACH DATABASE ? AS arch_read", (path,))
+        try:
+            _add_priority_column(conn, "arch_read")
+            yield "arch_read.complaints"
+        finally:
+            conn.commit()  # DETACH is refused while a transaction is open
+            conn.execute("DETACH DATABASE arch_read")
+
+
+# -----------------------------
+# Scheduled job
+# -----------------------------
+def run_maintenance(db_path, months=ARCHIVE_AFTER_MONTHS, vacuum=True):
+    conn = sqlite3.connect(db_path)
+    try:
+        moved = archive_old_complaints(conn, months)
+        if vacuum and sum(moved.values()):
+            compact(conn)
+        print(f"🧹 Maintenance done: {sum(moved.values())} complaints archived")
+        return moved
+    finally:
+        conn.close()
+
+
+def start_scheduler(db_path, interval_hours, months=ARCHIVE_AFTER_MONTHS):
+    """Run run_maintenance() every `interval_hours` on a daemon thread."""
+    def loop():
+        while True:
+            time.sleep(interval_hours * 3600)
+            try:
+                run_maintenance(db_path, months)
+            except Exception as e:
+                print("❌ Archive maintenance failed:", e)
+
+    thread = threading.Thread(target=loop, name="archive-maintenance", daemon=True)
+    thread.start()
+    return thread
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Archive old complaints and compact the hot DB")
+    parser.add_argument("--db", default=os.path.join(BASE_DIR, "grievance.db"))
+    parser.add_argument("--months", type=int, default=ARCHIVE_AFTER_MONTHS,
+                        help="keep this many months hot")
+    parser.add_argument("--no-vacuum", action="store_true")
+    args = parser.parse_args()
+    run_maintenance(args.db, args.months, vacuum=not args.no_vacuum)
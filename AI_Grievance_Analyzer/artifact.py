@@ -0,0 +1,282 @@
+import os
+import re
+import json
+import shutil
+import hashlib
+from collections import Counter
+import numpy as np
+
+# -----------------------------
+# Compact model artifact
+# -----------------------------
+# The joblib pickles carry a Python dict vocabulary that every worker has to
+# unpickle and keep in its own heap. The artifact below stores the same model
+# as plain .npy arrays (sorted vocabulary, IDF vector, class weight matrix) so
+# np.load(mmap_mode='r') lets all workers share the pages via the OS cache,
+# and ArtifactPredictor serves predictions without importing sklearn.
+#
+# Each export goes to its own model/artifact/<version>/ directory and is
+# published by atomically replacing the CURRENT pointer file. Files a worker
+# has memory-mapped are never rewritten (truncating a mapped file kills the
+# reader with SIGBUS), and a reload always sees one complete version.
+BASE_DIR = os.path.abspath(os.path.dirname(__file__))
+ARTIFACT_DIR = os.path.join(BASE_DIR, "model", "artifact")
+MANIFEST_NAME = "manifest.json"
+POINTER_NAME = "CURRENT"
+KEEP_VERSIONS = 3
+ARRAY_NAMES = ["terms", "columns", "idf", "weights", "bias", "classes", "stop_words"]
+
+
+def _linear_params(model):
+    """Return (weights, bias) so that scores = X @ weights + bias."""
+    if hasattr(model, "feature_log_prob_"):
+        # MultinomialNB / ComplementNB: joint log likelihood
+        weights = np.asarray(model.feature_log_prob_, dtype=np.float64).T
+        bias = np.asarray(model.class_log_prior_, dtype=np.float64)
+        return weights, bias, "nb"
+    if hasattr(model, "coef_"):
+        coef = np.asarray(model.coef_, dtype=np.float64)
+        intercept = np.asarray(model.intercept_, dtype=np.float64)
+        if coef.shape[0] == 1 and len(model.classes_) == 2:
+            # Binary linear model: expand to one column per class
+            coef = np.vstack([-coef, coef]) / 2.0
+            intercept = np.concatenate([-intercept, intercept]) / 2.0
+        return coef.T, intercept, "linear"
+    raise ValueError(f"Unsupported model type: {type(model).__name__}")
+
+
+def export_artifact(vectorizer, model, out_dir=ARTIFACT_DIR):
+    """Write a fitted TfidfVectorizer + linear classifier as an mmap-able artifact."""
+    params = vectorizer.get_params()
+    if params["analyzer"] != "word" or params["tokenizer"] or params["preprocessor"]:
+        raise ValueError("Only word analyzers with the default tokenizer are supported")
+    if params["strip_accents"]:
+        raise ValueError("strip_accents is not supported by the artifact predictor")
+
+    vocab = vectorizer.vocabulary_
+    terms = sorted(vocab)
+    weights, bias, kind = _linear_params(model)
+    idf = getattr(vectorizer, "idf_", None) if params["use_idf"] else None
+
+    arrays = {
+        "terms": np.array(terms, dtype=str),
+        "columns": np.array([vocab[t] for t in terms], dtype=np.int32),
+        "idf": np.asarray(idf if idf is not None else np.ones(len(vocab)), dtype=np.float64),
+        # One row per feature so a document only touches the rows it uses
+        "weights": np.ascontiguousarray(weights),
+        "bias": bias,
+        "classes": np.array([str(c) for c in model.classes_], dtype=str),
+        "stop_words": np.array(sorted(vectorizer.get_stop_words() or []), dtype=str),
+    }
+
+    digest = hashlib.sha256()
+    for name in ARRAY_NAMES:
+        digest.update(arrays[name].tobytes())
+
+    manifest = {
+        "version": digest.hexdigest()[:16],
+        "kind": kind,
+        "lowercase": params["lowercase"],
+        "token_pattern": params["token_pattern"],
+        "ngram_range": list(params["ngram_range"]),
+        "binary": params["binary"],
+        "sublinear_tf": params["sublinear_tf"],
+        "norm": params["norm"],
+    }
+    version = manifest["version"]
+
+    # Write the new version next to the live one, then publish it
+    os.makedirs(out_dir, exist_ok=True)
+    version_dir = os.path.join(out_dir, version)
+    if not os.path.isdir(version_dir):
+        tmp_dir = os.path.join(out_dir, f".tmp-{version}-{os.getpid()}")
+        os.makedirs(tmp_dir)
+        for name in ARRAY_NAMES:
+            np.save(os.path.join(tmp_dir, name + ".npy"), arrays[name])
+        with open(os.path.join(tmp_dir, MANIFEST_NAME), "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(tmp_dir, version_dir)
+
+    pointer_tmp = os.path.join(out_dir, f".{POINTER_NAME}-{os.getpid()}")
+    with open(pointer_tmp, "w", encoding="utf-8") as f:
+        f.write(version + "\n")
+    os.replace(pointer_tmp, os.path.join(out_dir, POINTER_NAME))
+    _prune_versions(out_dir, keep=version)
+
+    print(f"📦 Model artifact {version} written to {version_dir}")
+    return version
+
+
+def _prune_versions(out_dir, keep):
+    """Remove all but the newest KEEP_VERSIONS exports (never the live one).
+
+    On Linux a removed file stays valid for workers that still map it.
+    """
+    versions = sorted((d for d in os.listdir(out_dir)
+                       if os.path.isfile(os.path.join(out_dir, d, MANIFEST_NAME))),
+                      key=lambda d: os.path.getmtime(os.path.join(out_dir, d, MANIFEST_NAME)),
+                      reverse=True)
+    for old in versions[KEEP_VERSIONS:]:
+        if old != keep:
+            shutil.rmtree(os.path.join(out_dir, old), ignore_errors=True)
+
+
+def current_artifact_dir(artifact_dir=ARTIFACT_DIR):
+    """Directory of the published version, or None when nothing has been exported."""
+    try:
+        with open(os.path.join(artifact_dir, POINTER_NAME), encoding="utf-8") as f:
+            version = f.read().strip()
+    except OSError:
+        return None
+    version_dir = os.path.join(artifact_dir, version)
+    return version_dir if os.path.isfile(os.path.join(version_dir, MANIFEST_NAME)) else None
+
+
+class ArtifactPredictor:
+    """sklearn-free TF-IDF + linear classifier backed by memory-mapped arrays."""
+
+    def __init__(self, artifact_dir):
+        with open(os.path.join(artifact_dir, MANIFEST_NAME), encoding="utf-8") as f:
+            self.manifest = json.load(f)
+        self.version = self.manifest["version"]
+
+        arrays = {name: np.load(os.path.join(artifact_dir, name + ".npy"), mmap_mode="r")
+                  for name in ARRAY_NAMES}
+        self.terms = arrays["terms"]
+        # Fixed-width unicode: longer query tokens would be truncated to a false match
+        self.max_term_len = self.terms.dtype.itemsize // 4
+        self.columns = arrays["columns"]
+        self.idf = arrays["idf"]
+        self.weights = arrays["weights"]
+        self.bias = np.array(arrays["bias"])
+        self.classes = np.array(arrays["classes"])
+        self.stop_words = frozenset(arrays["stop_words"].tolist())
+
+        self.token_re = re.compile(self.manifest["token_pattern"])
+        self.min_n, self.max_n = self.manifest["ngram_range"]
+
+    # --- Text → features (mirrors sklearn's word analyzer) ---
+    def _analyze(self, text):
+        if self.manifest["lowercase"]:
+            text = text.lower()
+        tokens = [t for t in self.token_re.findall(text) if t not in self.stop_words]
+        if self.max_n == 1:
+            return tokens
+        ngrams = []
+        for n in range(self.min_n, min(self.max_n, len(tokens)) + 1):
+            for i in range(len(tokens) - n + 1):
+                ngrams.append(" ".join(tokens[i:i + n]))
+        return ngrams
+
+    def _lookup(self, terms):
+        """Binary-search the sorted vocabulary; returns (rows, positions found)."""
+        if not terms:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=bool)
+        pos = np.zeros(len(terms), dtype=np.int64)
+        found = np.zeros(len(terms), dtype=bool)
+        fits = np.array([len(t) <= self.max_term_len for t in terms])
+        if fits.any():
+            query = np.array([t for t, ok in zip(terms, fits) if ok], dtype=self.terms.dtype)
+            hits = np.minimum(np.searchsorted(self.terms, query), len(self.terms) - 1)
+            pos[fits] = hits
+            found[fits] = self.terms[hits] == query
+        return pos, found
+
+    def _features(self, text):
+        counts = Counter(self._analyze(text))
+        terms = list(counts)
+        pos, found = self._lookup(terms)
+        if not found.any():
+            return np.empty(0, dtype=np.int64), np.empty(0)
+
+        rows = pos[found]
+        tf = np.array([counts[t] for t, ok in zip(terms, found) if ok], dtype=np.float64)
+        if self.manifest["binary"]:
+            tf = np.ones_like(tf)
+        elif self.manifest["sublinear_tf"]:
+            tf = 1.0 + np.log(tf)
+
+        cols = np.asarray(self.columns[rows], dtype=np.int64)
+        values = tf * self.idf[cols]
+        norm = self.manifest["norm"]
+        if norm == "l2":
+            values /= np.sqrt(np.dot(values, values)) or 1.0
+        elif norm == "l1":
+            values /= np.abs(values).sum() or 1.0
+        return cols, values
+
+    # --- Scoring ---
+    def decision_function(self, texts):
+        scores = np.tile(self.bias, (len(texts), 1))
+        if len(texts) == 1:
+            cols, values = self._features(texts[0])
+            if len(cols):
+                scores[0] += values @ self.weights[cols]
+            return scores
+
+        # Batch: gather every (doc, feature, value) triple, then score in one pass
+        features = [self._features(text) for text in texts]
+        doc_idx = np.repeat(np.arange(len(texts)), [len(cols) for cols, _ in features])
+        if len(doc_idx):
+            cols = np.concatenate([cols for cols, _ in features])
+            values = np.concatenate([values for _, values in features])
+            np.add.at(scores, doc_idx, self.weights[cols] * values[:, None])
+        return scores
+
+    def predict_proba(self, texts):
+        scores = self.decision_function(texts)
+        scores -= scores.max(axis=1, keepdims=True)
+        probs = np.exp(scores)
+        return probs / probs.sum(axis=1, keepdims=True)
+
+    def predict(self, texts):
+        return self.classes[self.decision_function(texts).argmax(axis=1)]
+
+
+def load_artifact(artifact_dir=ARTIFACT_DIR):
+    """Return an ArtifactPredictor for the published version, or None."""
+    version_dir = current_artifact_dir(artifact_dir)
+    if version_dir is None:
+        return None
+    return ArtifactPredictor(version_dir)
+
+
+def artifact_mtime(artifact_dir=ARTIFACT_DIR):
+    """CURRENT pointer mtime (or None); cheap way for workers to notice a re-export."""
+    try:
+        return os.path.getmtime(os.path.join(artifact_dir, POINTER_NAME))
+    except OSError:
+        return None
+
+
+def check_parity(vectorizer, model, predictor, texts):
+    """Raise if the artifact disagrees with sklearn on any of `texts`."""
+    expected = model.predict_proba(vectorizer.transform(texts))
+    actual = predictor.predict_proba(texts)
+    bad = [t for t, e, a in zip(texts, expected, actual) if not np.allclose(e, a, atol=1e-9)]
+    if bad:
+        raise AssertionError(f"artifact differs from sklearn on {len(bad)} texts, e.g. {bad[0]!r}")
+    return len(texts)
+
+
+# -----------------------------
+# Convert the existing pickles
+# -----------------------------
+if __name__ == "__main__":
+    import joblib
+    import pandas as pd
+
+    vectorizer = joblib.load(os.path.join(BASE_DIR, "model/vectorizer.pkl"))
+    model = joblib.load(os.path.join(BASE_DIR, "model/grievance_model.pkl"))
+    export_artifact(vectorizer, model)
+
+    # Dataset texts plus tokens longer than, or missing from, the vocabulary
+    texts = []
+    for path in ["dataset/grievances.csv", "dataset/grievances1.csv", "../dataset_eng_marathi.csv"]:
+        path = os.path.join(BASE_DIR, path)
+        if os.path.isfile(path):
+            texts += pd.read_csv(path)["Complaint_Text"].dropna().astype(str).tolist()
+    texts += ["no ambulances available", "electricityyyyy supplies disrupted",
+              "waterlogging sanitationworkers", "zzzz qqqq", "", "पाणी पुरवठा बंद"]
+    texts += [" ".join(t + "s" for t in vectorizer.vocabulary_)]
+    print(f"✅ Artifact matches sklearn on {check_parity(vectorizer, model, load_artifact(), texts)} texts")
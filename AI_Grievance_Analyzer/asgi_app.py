@@ -0,0 +1,432 @@
+import os
+import time
+import asyncio
+import sqlite3
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import aiosqlite
+from quart import Quart, render_template, request, redirect, url_for, session, jsonify, g, Response
+from quart.sessions import SessionInterface
+
+# Models, OCR pool, cache and helpers are loaded once by the Flask module
+import app as core
+import bulk_ingest
+import metrics
+from metrics import stage
+from stats import stats_query, format_stats
+from search import search_queries, SEARCH_COLUMNS
+from users import UPSERT_USER_SQL, user_cache
+from server_session import open_server_session, save_server_session
+from priority import assess_priority, hint_priority, scheduler, notify_department, QueueFull
+from ocr_service import OcrServiceUnavailable
+from hotspots import hotspot_index
+
+# -----------------------------
+# ASGI serving mode
+# -----------------------------
+# Same routes as app.py, served by Quart under an ASGI server:
+#
+#   hypercorn asgi_app:app --bind 0.0.0.0:5000
+#
+# Handlers never block the event loop: SQLite goes through one shared
+# aiosqlite connection, and OCR / Whisper / classification run on a bounded
+# thread pool. INFERENCE_WORKERS caps the threads and INFERENCE_QUEUE caps
+# how many jobs may wait for them; beyond that, requests wait on the event
+# loop instead of piling up threads, so thousands of connections can stay
+# open while uploads stream in. OCR and Whisper go through the shared
+# priority scheduler instead, so emergencies are transcribed first.
+INFERENCE_WORKERS = int(os.getenv("INFERENCE_WORKERS", str(min(4, os.cpu_count() or 1))))
+INFERENCE_QUEUE = int(os.getenv("INFERENCE_QUEUE", str(INFERENCE_WORKERS * 8)))
+
+app = Quart(__name__, template_folder="Templates")
+app.secret_key = core.app.secret_key
+
+
+class QuartServerSessionInterface(SessionInterface):
+    """Same server-side store as the Flask app; store I/O runs off the loop."""
+
+    def __init__(self, store, lifetime):
+        self.store = store
+        self.lifetime = lifetime
+
+    async def open_session(self, app, request):
+        return await asyncio.to_thread(open_server_session, self, app, request)
+
+    async def save_session(self, app, session, response):
+        await asyncio.to_thread(save_server_session, self, app, session, response)
+
+
+# Sessions shared with Flask workers: same Redis / sessions.db, same cookie
+app.session_interface = QuartServerSessionInterface(core.app.session_interface.store,
+                                                    core.app.session_interface.lifetime)
+
+_executor = ThreadPoolExecutor(max_workers=INFERENCE_WORKERS, thread_name_prefix="inference")
+_slots = None
+_db = None
+
+
+async def run_inference(fn, *args):
+    """Run CPU-bound work on the bounded pool without blocking the loop."""
+    async with _slots:
+        return await asyncio.get_running_loop().run_in_executor(_executor, fn, *args)
+
+
+@app.before_serving
+async def open_db():
+    global _db, _slots
+    _slots = asyncio.Semaphore(INFERENCE_QUEUE)
+    _db = await aiosqlite.connect(core.DB_PATH)
+    # WAL lets readers proceed while a complaint is being written. Fetch the
+    # result so the statement is finalized and releases its exclusive lock.
+    await _db.execute_fetchall("PRAGMA journal_mode=WAL")
+
+
+@app.after_serving
+async def close_db():
+    await _db.close()
+    _executor.shutdown(wait=False)
+
+
+# -----------------------------
+# Request instrumentation
+# -----------------------------
+@app.before_request
+async def start_request_timer():
+    g.request_start = time.perf_counter()
+
+
+@app.after_request
+async def record_request_time(response):
+    if hasattr(g, "request_start"):
+        metrics.REQUEST_SECONDS.observe(request.endpoint or "unknown",
+                                        time.perf_counter() - g.request_start)
+    return response
+
+
+@app.route('/metrics')
+async def prometheus_metrics():
+    return Response(metrics.render_metrics(), mimetype="text/plain; version=0.0.4")
+
+
+# -----------------------------
+# Routes
+# -----------------------------
+@app.route('/')
+async def login():
+    return await render_template('login.html')
+
+
+@app.route('/login', methods=['POST'])
+async def do_login():
+    form = await request.form
+    name = form.get('name', '').strip()
+    mobile = form.get('mobile', '').strip()
+    password = form.get('password', '').strip()  # used only for admin
+
+    # --- Admin login ---
+    if name == core.ADMIN_USERNAME and password == core.ADMIN_PASSWORD:
+        session.rotate()
+        session['user_id'] = 0
+        session['username'] = "Admin"
+        session['role'] = "admin"
+        return redirect(url_for('admin_dashboard'))
+
+    # --- User login ---
+    if not name or not mobile:
+        return "Name and Mobile are required!"
+
+    # Cached (name, mobile) -> id; a miss is a single upsert
+    user_id = user_cache.get((name, mobile))
+    if user_id is None:
+        async with _db.execute(UPSERT_USER_SQL, (name, mobile)) as cur:
+            user_id = (await cur.fetchone())[0]
+        await _db.commit()
+        user_cache.put((name, mobile), user_id)
+
+    session.rotate()
+    session['user_id'] = user_id
+    session['username'] = name
+    session['role'] = 'user'
+    session['mobile'] = mobile
+    return redirect(url_for('index'))
+
+
+@app.route('/index')
+async def index():
+    if 'user_id' not in session or session.get('role') != 'user':
+        return redirect(url_for('login'))
+    return await render_template('index.html', username=session['username'])
+
+
+# OCR / Whisper backlog is full or the OCR service is down: shed the request
+@app.errorhandler(QueueFull)
+@app.errorhandler(OcrServiceUnavailable)
+async def scheduler_busy(e):
+    return jsonify({"error": "Server busy, please retry shortly"}), 503, {"Retry-After": "30"}
+
+
+@app.route('/predict', methods=['POST'])
+async def predict():
+    if 'user_id' not in session or session.get('role') != 'user':
+        return redirect(url_for('login'))
+
+    form = await request.form
+    files = await request.files
+
+    # --- Form fields ---
+    full_name = form.get("full_name", "")
+    village = form.get("village", "")
+    pincode = form.get("pincode", "")
+    aadhar = form.get("aadhar", "")
+    hint = form.get("lang") or session.get("lang")
+    provisional = hint_priority(form.get("category"))
+
+    extracted_text = ""
+    department = ""
+
+    # --- Text input ---
+    if form.get('complaint', '').strip():
+        extracted_text = form['complaint'].strip()
+        session['lang'] = core.guess_language(extracted_text)
+
+    # --- Image input ---
+    elif 'image' in files:
+        image_paths = []
+        for image_file in files.getlist('image'):
+            if image_file and image_file.filename:
+                image_path = os.path.join("static/uploads", image_file.filename)
+                with stage("upload_save"):
+                    await image_file.save(image_path)
+                image_paths.append(image_path)
+        if image_paths:
+            with stage("ocr"):
+                texts, scripts = await asyncio.wrap_future(scheduler.submit(
+                    provisional, core.run_ocr, image_paths, hint=hint))
+            extracted_text = " ".join(texts)
+            session['lang'] = max(set(scripts), key=scripts.count)
+
+    # --- Audio input ---
+    elif 'audio' in files:
+        audio_file = files['audio']
+        if audio_file and audio_file.filename:
+            audio_path = os.path.join("static/recordings", audio_file.filename)
+            with stage("upload_save"):
+                await audio_file.save(audio_path)
+            with stage("transcribe"):
+                result = await asyncio.wrap_future(scheduler.submit(
+                    provisional, core.audio_preprocess.transcribe, core.whisper_model, audio_path, language=hint))
+            extracted_text = result["text"]
+            if result["language"]:
+                session['lang'] = result["language"]
+
+    if extracted_text.strip():
+        department, _ = await run_inference(core.classify, extracted_text)
+    else:
+        extracted_text = "No complaint text provided."
+        department = "Unknown"
+    priority = assess_priority(department, extracted_text)
+
+    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+    # --- Save to DB ---
+    with stage("db_insert"):
+        cursor = await _db.execute("""
+            INSERT INTO complaints (user_id, full_name, village, pincode, aadhar, complaint_text, department, timestamp, priority)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, (session['user_id'], full_name, village, pincode, aadhar, extracted_text, department, timestamp, priority))
+        complaint_id = cursor.lastrowid
+        await _db.commit()
+    print(f"✅ Complaint saved to DB: {extracted_text[:60]} → {department} ({priority})")
+    hotspot_index.record(pincode, village, department, timestamp, complaint_id=complaint_id)
+
+    # --- Route to the department (queued by priority) ---
+    notify_department(complaint_id, department, priority, village, pincode, extracted_text)
+
+    # --- Save to CSV ---
+    with stage("csv_append"):
+        await asyncio.to_thread(core.save_to_csv, full_name, session['mobile'], village, pincode,
+                                aadhar, extracted_text, department, timestamp)
+
+    return await render_template('index.html',
+                                 username=session['username'],
+                                 complaint=extracted_text,
+                                 department=department,
+                                 priority=priority)
+
+
+# -----------------------------
+# Admin Dashboard
+# -----------------------------
+@app.route('/admin')
+async def admin_dashboard():
+    if session.get('role') != 'admin':
+        return redirect(url_for('login'))
+    complaints = await _db.execute_fetchall(core.listing_sql())
+    return await render_template('admin_dashboard.html', complaints=complaints)
+
+
+@app.route('/admin/stats')
+async def admin_stats():
+    if session.get('role') != 'admin':
+        return redirect(url_for('login'))
+
+    try:
+        days = max(1, int(request.args.get('days', 7)))
+        limit = max(1, int(request.args.get('limit', 10)))
+    except ValueError:
+        return jsonify({"error": "days and limit must be integers"}), 400
+
+    group_by = request.args.get('group_by', 'department')
+    try:
+        sql, params = stats_query(group_by, days,
+                                  pincode=request.args.get('pincode'),
+                                  village=request.args.get('village'),
+                                  department=request.args.get('department'),
+                                  limit=limit,
+                                  priority=request.args.get('priority'))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    rows = await _db.execute_fetchall(sql, params)
+    return jsonify(format_stats(group_by, rows))
+
+
+@app.route('/admin/search')
+async def admin_search():
+    if session.get('role') != 'admin':
+        return redirect(url_for('login'))
+
+    query = request.args.get('q', '').strip()
+    try:
+        page = max(1, int(request.args.get('page', 1)))
+        per_page = min(100, max(1, int(request.args.get('per_page', 20))))
+    except ValueError:
+        return jsonify({"error": "page and per_page must be integers"}), 400
+
+    results, total = [], 0
+    queries = search_queries(query,
+                             department=request.args.get('department'),
+                             date_from=request.args.get('from'),
+                             date_to=request.args.get('to'),
+                             page=page, per_page=per_page)
+    if queries is not None:
+        count_sql, page_sql, params, page_params = queries
+        total = (await _db.execute_fetchall(count_sql, params))[0][0]
+        rows = await _db.execute_fetchall(page_sql, page_params)
+        results = [dict(zip(SEARCH_COLUMNS, row)) for row in rows]
+    return jsonify({"query": query, "total": total, "page": page,
+                    "per_page": per_page, "results": results})
+
+
+# -----------------------------
+# Bulk ingestion API
+# -----------------------------
+BULK_SPOOL_BYTES = 8 * 1024 * 1024  # raw bodies beyond this spill to a temp file
+
+
+def _ingest_stream(stream, fmt):
+    conn = sqlite3.connect(core.DB_PATH)
+    try:
+        return bulk_ingest.ingest(conn, bulk_ingest.iter_rows(stream, fmt), core.classify_batch,
+                                  csv_path=core.CSV_PATH)
+    finally:
+        conn.close()
+
+
+@app.route('/api/complaints/bulk', methods=['POST'])
+async def bulk_complaints():
+    api_key = request.headers.get("X-API-Key", "")
+    if session.get('role') != 'admin' and not (core.BULK_API_KEY and api_key == core.BULK_API_KEY):
+        return jsonify({"error": "admin login or X-API-Key required"}), 401
+
+    # Bulk files can be far larger and slower than Quart's 16 MB / 60 s defaults
+    request.max_content_length = None
+    request.body_timeout = None
+
+    # Either a multipart 'file' upload or the raw request body
+    upload = None
+    if (request.content_type or "").startswith("multipart/form-data"):
+        upload = (await request.files).get('file')
+    if upload:
+        stream, filename = upload.stream, upload.filename or ""
+    else:
+        stream, filename = tempfile.SpooledTemporaryFile(max_size=BULK_SPOOL_BYTES), ""
+        async for chunk in request.body:
+            stream.write(chunk)
+        stream.seek(0)
+    fmt = request.args.get('format') or bulk_ingest.detect_format(filename, request.content_type or "")
+
+    try:
+        summary = await run_inference(_ingest_stream, stream, fmt)
+    finally:
+        stream.close()
+    print(f"📦 Bulk import: {summary['inserted']} inserted, {summary['error_count']} rejected")
+    return jsonify(summary)
+
+
+def _sync_hotspots():
+    conn = sqlite3.connect(core.DB_PATH)
+    try:
+        hotspot_index.sync(conn)
+    finally:
+        conn.close()
+
+
+@app.route('/admin/hotspots')
+async def admin_hotspots():
+    if session.get('role') != 'admin':
+        return redirect(url_for('login'))
+
+    try:
+        limit = min(100, max(1, int(request.args.get('limit', 20))))
+    except ValueError:
+        return jsonify({"error": "limit must be an integer"}), 400
+    level = request.args.get('level')
+    if level not in (None, 'pincode', 'village'):
+        return jsonify({"error": "level must be 'pincode' or 'village'"}), 400
+
+    await asyncio.to_thread(_sync_hotspots)
+    return jsonify({**hotspot_index.window_info(),
+                    "hotspots": hotspot_index.hotspots(department=request.args.get('department'),
+                                                       level=level, limit=limit)})
+
+
+@app.route('/admin/cache_stats')
+async def cache_stats():
+    if session.get('role') != 'admin':
+        return redirect(url_for('login'))
+    return jsonify(core.prediction_cache.stats())
+
+
+# -----------------------------
+# Logout
+# -----------------------------
+@app.route('/logout')
+async def logout():
+    session.clear()
+    return redirect(url_for('login'))
+
+
+# -----------------------------
+# View complaints API (optional)
+# -----------------------------
+@app.route('/view_complaints')
+async def view_complaints():
+    if session.get('role') != 'admin':
+        return redirect(url_for('login'))
+    # A ?from=&to= range may reach the monthly archives; that read is synchronous
+    date_from = request.args.get('from')
+    date_to = request.args.get('to')
+    if date_from or date_to:
+        data = await asyncio.to_thread(core.list_complaints, date_from, date_to)
+    else:
+        data = await _db.execute_fetchall(core.listing_sql())
+    return jsonify([list(row) for row in data])
+
+
+# -----------------------------
+# Run App
+# -----------------------------
+if __name__ == '__main__':
+    app.run(debug=True)
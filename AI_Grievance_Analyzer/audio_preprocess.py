@@ -0,0 +1,91 @@
+import numpy as np
+import torch
+import whisper
+
+# -----------------------------
+# Audio pre-processing for Whisper
+# -----------------------------
+# Voice complaints are mostly short clips padded with silence. Instead of
+# whisper_model.transcribe() on the raw file (language detection on every
+# call, 30s sliding windows over silence) we decode + resample once, trim
+# leading/trailing silence with an energy VAD, cut long recordings into
+# <=30s chunks at quiet points and decode all chunks as one batch.
+SAMPLE_RATE = whisper.audio.SAMPLE_RATE  # 16 kHz
+FRAME = int(0.03 * SAMPLE_RATE)          # 30 ms VAD frames
+CHUNK_SECONDS = 30                       # Whisper's input window
+SUPPORTED_HINTS = {"en", "mr", "hi"}
+
+
+def frame_energy_db(audio):
+    """RMS energy (dBFS) of consecutive 30 ms frames."""
+    n = len(audio) // FRAME
+    if n == 0:
+        return np.empty(0)
+    frames = audio[:n * FRAME].reshape(n, FRAME)
+    rms = np.sqrt(np.mean(frames ** 2, axis=1) + 1e-12)
+    return 20 * np.log10(rms)
+
+
+def trim_silence(audio, threshold_db=35.0, floor_db=-55.0, pad_seconds=0.2):
+    """Drop leading/trailing frames quieter than the loudest frame - threshold_db."""
+    energy = frame_energy_db(audio)
+    if energy.size == 0:
+        return audio
+    limit = max(energy.max() - threshold_db, floor_db)
+    voiced = np.flatnonzero(energy > limit)
+    if voiced.size == 0:
+        return audio[:0]
+    pad = int(pad_seconds * SAMPLE_RATE)
+    start = max(voiced[0] * FRAME - pad, 0)
+    end = min((voiced[-1] + 1) * FRAME + pad, len(audio))
+    return audio[start:end]
+
+
+def split_chunks(audio, max_seconds=CHUNK_SECONDS, search_seconds=5):
+    """Split into <= max_seconds pieces, cutting at the quietest nearby frame."""
+    max_len = max_seconds * SAMPLE_RATE
+    chunks = []
+    while len(audio) > max_len:
+        window = audio[max_len - search_seconds * SAMPLE_RATE:max_len]
+        energy = frame_energy_db(window)
+        cut = max_len - len(window) + int(np.argmin(energy)) * FRAME
+        chunks.append(audio[:cut])
+        audio = audio[cut:]
+    if len(audio):
+        chunks.append(audio)
+    return chunks
+
+
+def transcribe(model, audio_path, language=None, batch_size=8):
+    """Batched Whisper transcription; `language` skips detection when given."""
+    audio = whisper.load_audio(audio_path)  # one ffmpeg decode + resample
+    audio = trim_silence(audio)
+    if len(audio) == 0:
+        return {"text": "", "language": language, "audio_seconds": 0.0}
+
+    n_mels = getattr(model.dims, "n_mels", 80)
+    mels = torch.stack([
+        whisper.log_mel_spectrogram(whisper.pad_or_trim(chunk), n_mels=n_mels)
+        for chunk in split_chunks(audio)
+    ]).to(model.device)
+
+    if language not in SUPPORTED_HINTS:
+        # Detect once on the first chunk and reuse it for the rest
+        _, probs = model.detect_language(mels[:1])
+        language = max(probs[0], key=probs[0].get)
+
+    options = whisper.DecodingOptions(
+        language=language,
+        without_timestamps=True,
+        fp16=model.device.type == "cuda",
+    )
+    texts = []
+    for i in range(0, len(mels), batch_size):
+        for result in whisper.decode(model, mels[i:i + batch_size], options):
+            texts.append(result.text.strip())
+
+    return {
+        "text": " ".join(t for t in texts if t),
+        "language": language,
+        "audio_seconds": len(audio) / SAMPLE_RATE,
+    }
@@ -0,0 +1,71 @@
+import os
+import sys
+import time
+from difflib import SequenceMatcher
+import image_preprocess
+from ocr_readers import ReaderPool
+
+# -----------------------------
+# OCR latency vs accuracy benchmark
+# -----------------------------
+# Usage: python bench_ocr.py [folder of images] [max_edge ...]
+# Accuracy is the word-level similarity to a ground-truth <image>.txt when one
+# exists next to the image, otherwise to full-resolution OCR output.
+IMAGE_EXTS = (".png", ".jpg", ".jpeg", ".webp", ".bmp")
+
+
+def similarity(a, b):
+    return SequenceMatcher(None, a.lower().split(), b.lower().split()).ratio()
+
+
+def main():
+    folder = sys.argv[1] if len(sys.argv) > 1 else "static/uploads"
+    edges = [int(e) for e in sys.argv[2:]] or [2400, 1600, 1200, 800]
+
+    images = sorted(os.path.join(folder, f) for f in os.listdir(folder)
+                    if f.lower().endswith(IMAGE_EXTS))
+    if not images:
+        print(f"❌ No images found in {folder}")
+        return
+
+    pool = ReaderPool()
+    reader = pool.get('en')
+
+    # Baseline: full-resolution readtext on the file path
+    references, baseline_texts, baseline = {}, {}, 0.0
+    for path in images:
+        start = time.perf_counter()
+        text = baseline_texts[path] = " ".join(reader.readtext(path, detail=0))
+        baseline += time.perf_counter() - start
+        truth = os.path.splitext(path)[0] + ".txt"
+        if os.path.isfile(truth):
+            with open(truth, encoding="utf-8") as f:
+                references[path] = f.read()
+        else:
+            references[path] = text
+
+    print(f"{'setting':18} {'ms/image':>9} {'accuracy':>9}")
+    # Without a ground-truth file the reference is this same output, so it scores 1.0
+    base_acc = sum(similarity(references[p], baseline_texts[p]) for p in images) / len(images)
+    print(f"{'full resolution':18} {baseline * 1000 / len(images):9.1f} {base_acc:9.3f}")
+
+    for edge in edges:
+        elapsed, score = 0.0, 0.0
+        for path in images:
+            start = time.perf_counter()
+            image = image_preprocess.preprocess(path, max_edge=edge)
+            text = " ".join(reader.readtext(image, detail=0))
+            elapsed += time.perf_counter() - start
+            score += similarity(references[path], text)
+        label = f"max_edge={edge}"
+        print(f"{label:18} {elapsed * 1000 / len(images):9.1f} {score / len(images):9.3f}")
+
+    # One batched call for the whole folder, as for a multi-page submission
+    start = time.perf_counter()
+    image_preprocess.ocr_images(pool, images)
+    batched = time.perf_counter() - start
+    print(f"{'batched (default)':18} {batched * 1000 / len(images):9.1f} {'-':>9}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+import os
+import sys
+import time
+import whisper
+import audio_preprocess
+
+# -----------------------------
+# Whisper real-time factor benchmark
+# -----------------------------
+# Usage: python bench_whisper.py <folder of clips> [model] [lang]
+# RTF = processing seconds / audio seconds (lower is better).
+AUDIO_EXTS = (".wav", ".mp3", ".m4a", ".ogg", ".webm", ".flac")
+
+
+def main():
+    folder = sys.argv[1] if len(sys.argv) > 1 else "static/recordings"
+    model_name = sys.argv[2] if len(sys.argv) > 2 else "tiny"
+    language = sys.argv[3] if len(sys.argv) > 3 else None
+
+    clips = sorted(os.path.join(folder, f) for f in os.listdir(folder)
+                   if f.lower().endswith(AUDIO_EXTS))
+    if not clips:
+        print(f"❌ No audio clips found in {folder}")
+        return
+
+    model = whisper.load_model(model_name)
+    total_audio = total_before = total_after = 0.0
+
+    print(f"{'clip':30} {'audio s':>8} {'RTF before':>11} {'RTF after':>10}")
+    for path in clips:
+        duration = len(whisper.load_audio(path)) / audio_preprocess.SAMPLE_RATE
+
+        start = time.perf_counter()
+        model.transcribe(path)
+        before = time.perf_counter() - start
+
+        start = time.perf_counter()
+        audio_preprocess.transcribe(model, path, language=language)
+        after = time.perf_counter() - start
+
+        total_audio += duration
+        total_before += before
+        total_after += after
+        print(f"{os.path.basename(path)[:30]:30} {duration:8.1f} "
+              f"{before / duration:11.3f} {after / duration:10.3f}")
+
+    print(f"\n📊 {len(clips)} clips, {total_audio:.1f}s of audio")
+    print(f"   RTF before: {total_before / total_audio:.3f}")
+    print(f"   RTF after:  {total_after / total_audio:.3f}")
+    print(f"   Speedup:    {total_before / total_after:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,223 @@
+import io
+import os
+import csv
+import json
+import time
+import sqlite3
+from datetime import datetime
+
+from prediction_cache import normalize_text
+from priority import assess_priority
+from users import init_users
+
+# -----------------------------
+# Bulk complaint ingestion
+# -----------------------------
+# Offline kiosks and call-center sheets arrive as CSV / NDJSON in the
+# dataset_eng_marathi.csv schema (Complaint_Text, Village, Pincode, Date, ...).
+# Rows are parsed as a stream and handled in chunks: each chunk is classified
+# in one vectorized call (duplicate texts classified once), given a priority,
+# and inserted with executemany inside a single transaction. Bad rows are
+# reported with their row number and skipped; they never abort the batch.
+CHUNK_SIZE = 2000
+MAX_REPORTED_ERRORS = 1000
+BULK_USER = ("Bulk Import", "")
+
+# users.UPSERT_USER_SQL with the 'import' role: concurrent first imports
+# (Flask threads, ASGI + CLI) resolve to one row instead of an IntegrityError
+UPSERT_BULK_USER_SQL = """
+    INSERT INTO users (name, mobile, role) VALUES (?, ?, 'import')
+    ON CONFLICT (name, mobile) DO UPDATE SET name = excluded.name
+    RETURNING id
+"""
+
+INSERT_SQL = """
+    INSERT INTO complaints (user_id, full_name, village, pincode, aadhar, complaint_text, department, timestamp, priority)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+
+def iter_rows(stream, fmt="csv"):
+    """Yield dict rows from a binary stream of CSV or NDJSON, one at a time."""
+    text = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+    if fmt == "ndjson":
+        for line in text:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError as e:
+                row = {"__error__": f"invalid JSON: {e}"}
+            yield row if isinstance(row, dict) else {"__error__": "expected a JSON object"}
+    else:
+        yield from csv.DictReader(text)
+
+
+def detect_format(filename="", content_type=""):
+    if "ndjson" in content_type or "jsonl" in content_type or filename.endswith((".ndjson", ".jsonl")):
+        return "ndjson"
+    return "csv"
+
+
+def parse_row(row):
+    """Validate one input row; returns (values, None) or (None, error message)."""
+    if "__error__" in row:
+        return None, row["__error__"]
+    text = str(row.get("Complaint_Text") or "").strip()
+    if not text:
+        return None, "Complaint_Text is empty"
+
+    date = str(row.get("Date") or "").strip()
+    if not date:
+        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    else:
+        for fmt in ("%Y-%m-%d %H:%M:%S", "%Y-%m-%d"):
+            try:
+                timestamp = datetime.strptime(date, fmt).strftime("%Y-%m-%d %H:%M:%S")
+                break
+            except ValueError:
+                pass
+        else:
+            return None, f"invalid Date {date!r} (expected YYYY-MM-DD)"
+
+    return {
+        "full_name": str(row.get("Full_Name") or row.get("Full Name") or ""),
+        "mobile": str(row.get("Mobile") or ""),
+        "village": str(row.get("Village") or ""),
+        "pincode": str(row.get("Pincode") or ""),
+        "aadhar": str(row.get("Aadhar") or ""),
+        "complaint_text": text,
+        "timestamp": timestamp,
+    }, None
+
+
+def bulk_user_id(conn):
+    """All bulk rows belong to one 'Bulk Import' user so admin joins still see them."""
+    user_id = conn.execute(UPSERT_BULK_USER_SQL, BULK_USER).fetchone()[0]
+    conn.commit()
+    return user_id
+
+
+def _classify_unique(texts, classify_batch):
+    keys = [normalize_text(t) for t in texts]
+    unique = {}
+    for key, text in zip(keys, texts):
+        unique.setdefault(key, text)
+    departments = dict(zip(unique, classify_batch(list(unique.values()))))
+    return [departments[k] for k in keys]
+
+
+def ingest(conn, rows, classify_batch, user_id=None, csv_path=None, chunk_size=CHUNK_SIZE):
+    """Classify and insert `rows`; returns a summary with per-row errors."""
+    if user_id is None:
+        user_id = bulk_user_id(conn)
+
+    start = time.perf_counter()
+    inserted, error_count, errors = 0, 0, []
+    chunk = []
+
+    def report(row_no, error):
+        nonlocal error_count
+        error_count += 1
+        if len(errors) < MAX_REPORTED_ERRORS:
+            errors.append({"row": row_no, "error": error})
+
+    def flush():
+        nonlocal inserted
+        if not chunk:
+            return
+        departments = _classify_unique([r["complaint_text"] for r in chunk], classify_batch)
+        params = [(user_id, r["full_name"], r["village"], r["pincode"], r["aadhar"],
+                   r["complaint_text"], dept, r["timestamp"], assess_priority(dept, r["complaint_text"]))
+                  for r, dept in zip(chunk, departments)]
+        try:
+            with conn:  # one transaction per chunk
+                conn.executemany(INSERT_SQL, params)
+            stored = list(zip(chunk, departments))
+        except sqlite3.DatabaseError:
+            # Rolled back: redo this chunk row by row to pin down the bad rows
+            stored = []
+            with conn:
+                for r, dept, p in zip(chunk, departments, params):
+                    try:
+                        conn.execute(INSERT_SQL, p)
+                        stored.append((r, dept))
+                    except sqlite3.DatabaseError as e:
+                        report(r["row_no"], f"database error: {e}")
+        if csv_path and stored:
+            append_csv(csv_path, [r for r, _ in stored], [d for _, d in stored])
+        inserted += len(stored)
+        chunk.clear()
+
+    for row_no, row in enumerate(rows, start=1):
+        values, error = parse_row(row)
+        if error:
+            report(row_no, error)
+            continue
+        values["row_no"] = row_no
+        chunk.append(values)
+        if len(chunk) >= chunk_size:
+            flush()
+    flush()
+
+    elapsed = time.perf_counter() - start
+    return {
+        "inserted": inserted,
+        "error_count": error_count,
+        "errors": errors,
+        "seconds": round(elapsed, 3),
+        "rows_per_sec": round(inserted / elapsed, 1) if elapsed else None,
+    }
+
+
+def append_csv(csv_path, rows, departments):
+    """Same columns as app.save_to_csv, written once per chunk."""
+    file_exists = os.path.isfile(csv_path)
+    with open(csv_path, 'a', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        if not file_exists:
+            writer.writerow(["Full Name", "Mobile", "Village", "Pincode", "Aadhar", "Complaint", "Department", "Timestamp"])
+        writer.writerows([r["full_name"], r["mobile"], r["village"], r["pincode"], r["aadhar"],
+                          r["complaint_text"], dept, r["timestamp"]]
+                         for r, dept in zip(rows, departments))
+
+
+# -----------------------------
+# CLI
+# -----------------------------
+def main():
+    import argparse
+    from artifact import load_artifact
+
+    base_dir = os.path.abspath(os.path.dirname(__file__))
+    parser = argparse.ArgumentParser(description="Bulk-load complaints from CSV / NDJSON")
+    parser.add_argument("path", help="input file in the dataset_eng_marathi.csv schema")
+    parser.add_argument("--db", default=os.path.join(base_dir, "grievance.db"))
+    parser.add_argument("--csv", default=os.path.join(base_dir, "complaints.csv"),
+                        help="also append to this CSV ('' to skip)")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    args = parser.parse_args()
+
+    classifier = load_artifact()
+    if classifier is None:
+        raise SystemExit("❌ No model artifact found; run artifact.py first")
+
+    conn = sqlite3.connect(args.db)
+    init_users(conn)  # unique (name, mobile) index for the bulk user upsert
+    with open(args.path, "rb") as f:
+        summary = ingest(conn, iter_rows(f, detect_format(args.path)),
+                         lambda texts: list(classifier.predict(texts)),
+                         csv_path=args.csv or None, chunk_size=args.chunk_size)
+    conn.close()
+
+    print(f"✅ Inserted {summary['inserted']} complaints in {summary['seconds']}s "
+          f"({summary['rows_per_sec']} rows/sec)")
+    if summary["error_count"]:
+        print(f"⚠️ {summary['error_count']} rows skipped:")
+        for err in summary["errors"][:20]:
+            print(f"   row {err['row']}: {err['error']}")
+
+
+if __name__ == "__main__":
+    main()
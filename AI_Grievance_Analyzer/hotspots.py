@@ -0,0 +1,203 @@
+import os
+import time
+import threading
+from array import array
+from datetime import datetime
+
+# -----------------------------
+# Pincode / village hotspots
+# -----------------------------
+# An in-memory index keyed by (pincode, department) and
+# (pincode, village, department). Each key keeps a ring of per-bucket counts
+# covering the current window plus a baseline before it, with both sums kept
+# up to date, so recording a complaint is O(1). A key whose window count is
+# well above what its baseline predicts is a hotspot; the hot keys are kept
+# in a small set and the ranked list is cached per bucket, so polling the
+# endpoint costs the same however many complaints are stored.
+#
+# Each worker keeps its own index. Complaints stored elsewhere (other
+# workers, the bulk CLI) are picked up by sync(), which reads only rows with
+# an id above the last one seen, at most every HOTSPOT_SYNC_SECONDS.
+BUCKET_SECONDS = int(os.getenv("HOTSPOT_BUCKET_SECONDS", "600"))       # 10 minutes
+WINDOW_BUCKETS = int(os.getenv("HOTSPOT_WINDOW_BUCKETS", "6"))         # current window: 1 hour
+BASELINE_BUCKETS = int(os.getenv("HOTSPOT_BASELINE_BUCKETS", "144"))   # baseline: the 24 hours before it
+MIN_COUNT = int(os.getenv("HOTSPOT_MIN_COUNT", "5"))
+SPIKE_RATIO = float(os.getenv("HOTSPOT_SPIKE_RATIO", "3"))
+SYNC_SECONDS = float(os.getenv("HOTSPOT_SYNC_SECONDS", "5"))
+
+
+def _epoch(timestamp):
+    return datetime.strptime(timestamp, "%Y-%m-%d %H:%M:%S").timestamp()
+
+
+class _Counter:
+    """Per-bucket counts for one key; bucket `head` is the newest."""
+    __slots__ = ("slots", "head", "window", "baseline")
+
+    def __init__(self, size, head):
+        self.slots = array("I", bytes(4 * size))
+        self.head = head
+        self.window = 0
+        self.baseline = 0
+
+
+class HotspotIndex:
+    def __init__(self, bucket_seconds=BUCKET_SECONDS, window_buckets=WINDOW_BUCKETS,
+                 baseline_buckets=BASELINE_BUCKETS, min_count=MIN_COUNT, spike_ratio=SPIKE_RATIO):
+        self.bucket_seconds = bucket_seconds
+        self.window_buckets = window_buckets
+        self.baseline_buckets = baseline_buckets
+        self.size = window_buckets + baseline_buckets
+        self.min_count = min_count
+        self.spike_ratio = spike_ratio
+
+        self._counters = {}       # key -> _Counter
+        self._villages = {}       # (pincode, department) -> {village key, ...}
+        self._hot = set()
+        self._cache = None        # (bucket, ranked hotspots)
+        self._lock = threading.Lock()
+        self.last_id = 0
+        self._recorded_ids = set()
+        self._synced_at = 0.0
+
+    # --- counting ---
+    def _advance(self, counter, bucket):
+        """Move `counter` forward to `bucket`, shifting counts out of the window."""
+        steps = bucket - counter.head
+        if steps <= 0:
+            return
+        if steps >= self.size:
+            counter.slots = array("I", bytes(4 * self.size))
+            counter.window = counter.baseline = 0
+        else:
+            slots = counter.slots
+            for b in range(counter.head + 1, bucket + 1):
+                # Oldest baseline bucket drops out; oldest window bucket joins the baseline
+                expired = b % self.size
+                counter.baseline -= slots[expired]
+                slots[expired] = 0
+                moved = slots[(b - self.window_buckets) % self.size]
+                counter.window -= moved
+                counter.baseline += moved
+        counter.head = bucket
+
+    def _add(self, key, bucket, now_bucket):
+        counter = self._counters.get(key)
+        if counter is None:
+            counter = self._counters[key] = _Counter(self.size, now_bucket)
+        self._advance(counter, now_bucket)
+        age = now_bucket - bucket
+        if age < 0 or age >= self.size:
+            return
+        counter.slots[bucket % self.size] += 1
+        if age < self.window_buckets:
+            counter.window += 1
+        else:
+            counter.baseline += 1
+        self._evaluate(key, counter)
+
+    def _expected(self, counter):
+        return counter.baseline * self.window_buckets / self.baseline_buckets
+
+    def _evaluate(self, key, counter):
+        hot = (counter.window >= self.min_count and
+               counter.window >= self.spike_ratio * max(self._expected(counter), 1.0))
+        if hot != (key in self._hot):
+            (self._hot.add if hot else self._hot.discard)(key)
+            self._cache = None
+        elif hot:
+            self._cache = None  # score changed
+
+    def record(self, pincode, village, department, when=None, complaint_id=None):
+        """Count one stored complaint (`when` is its timestamp string, default now)."""
+        now_bucket = int(time.time() // self.bucket_seconds)
+        bucket = int(_epoch(when) // self.bucket_seconds) if when else now_bucket
+        pincode, village, department = pincode or "", village or "", department or ""
+        with self._lock:
+            if complaint_id is not None:
+                if complaint_id <= self.last_id:
+                    return
+                self._recorded_ids.add(complaint_id)
+            self._add(("pincode", pincode, "", department), bucket, now_bucket)
+            village_key = ("village", pincode, village, department)
+            self._add(village_key, bucket, now_bucket)
+            self._villages.setdefault((pincode, department), set()).add(village_key)
+
+    # --- loading from SQLite ---
+    def sync(self, conn, force=False):
+        """Count complaints inserted since the last sync (by any process)."""
+        if not force and time.monotonic() - self._synced_at < SYNC_SECONDS:
+            return
+        self._synced_at = time.monotonic()
+        since = datetime.fromtimestamp(
+            (int(time.time() // self.bucket_seconds) - self.size + 1) * self.bucket_seconds
+        ).strftime("%Y-%m-%d %H:%M:%S")
+        last_id = conn.execute("SELECT IFNULL(MAX(id), 0) FROM complaints").fetchone()[0]
+        rows = conn.execute("""
+            SELECT id, pincode, village, department, timestamp FROM complaints
+            WHERE id > ? AND id <= ? AND timestamp >= ? ORDER BY id
+        """, (self.last_id, last_id, since)).fetchall()
+        for complaint_id, pincode, village, department, timestamp in rows:
+            if complaint_id in self._recorded_ids:
+                continue
+            try:
+                self.record(pincode, village, department, timestamp)
+            except ValueError:
+                pass  # unparseable timestamp
+        with self._lock:
+            self.last_id = max(self.last_id, last_id)
+            self._recorded_ids = {i for i in self._recorded_ids if i > self.last_id}
+
+    # --- querying ---
+    def _hotspot(self, key, counter, now_bucket):
+        level, pincode, village, department = key
+        expected = self._expected(counter)
+        spot = {
+            "level": level,
+            "pincode": pincode,
+            "department": department,
+            "count": counter.window,
+            "baseline": round(expected, 2),
+            "ratio": round(counter.window / max(expected, 1.0), 2),
+        }
+        if level == "village":
+            spot["village"] = village
+        else:
+            affected = 0
+            for village_key in self._villages.get((pincode, department), ()):
+                village_counter = self._counters[village_key]
+                self._advance(village_counter, now_bucket)
+                affected += village_counter.window > 0
+            spot["villages_affected"] = affected
+        return spot
+
+    def hotspots(self, department=None, level=None, limit=20):
+        """Current spikes, highest ratio first."""
+        now_bucket = int(time.time() // self.bucket_seconds)
+        with self._lock:
+            if self._cache is None or self._cache[0] != now_bucket:
+                # Only hot keys are revisited: time passing can cool them down
+                for key in list(self._hot):
+                    counter = self._counters[key]
+                    self._advance(counter, now_bucket)
+                    self._evaluate(key, counter)
+                ranked = sorted((self._hotspot(k, self._counters[k], now_bucket) for k in self._hot),
+                                key=lambda s: (-s["ratio"], -s["count"]))
+                self._cache = (now_bucket, ranked)
+            ranked = self._cache[1]
+        if department:
+            ranked = [s for s in ranked if s["department"] == department]
+        if level:
+            ranked = [s for s in ranked if s["level"] == level]
+        return ranked[:limit]
+
+    def window_info(self):
+        return {
+            "window_minutes": self.window_buckets * self.bucket_seconds // 60,
+            "baseline_hours": round(self.baseline_buckets * self.bucket_seconds / 3600, 1),
+            "min_count": self.min_count,
+            "spike_ratio": self.spike_ratio,
+        }
+
+
+hotspot_index = HotspotIndex()
@@ -0,0 +1,151 @@
+import cv2
+import numpy as np
+from ocr_readers import normalize_script
+
+# -----------------------------
+# Image pre-processing for EasyOCR
+# -----------------------------
+# OCR time scales with pixel count and uploads are full-resolution phone
+# photos / screenshots. Each image is decoded once, downscaled so the long
+# edge is at most MAX_EDGE, converted to grayscale and cropped to the area a
+# cheap morphology pass thinks contains text. Each image is routed to the
+# English or Devanagari recognizer by detect_script(), and images of the same
+# script from one submission are padded to a common canvas and sent to
+# readtext_batched.
+MAX_EDGE = 1600
+CROP_MARGIN = 12
+
+
+def load_image(path):
+    """Decode once; np.fromfile also copes with non-ASCII upload names."""
+    data = np.fromfile(path, dtype=np.uint8)
+    image = cv2.imdecode(data, cv2.IMREAD_COLOR)
+    if image is None:
+        raise ValueError(f"Could not decode image: {path}")
+    return image
+
+
+def downscale(image, max_edge=MAX_EDGE):
+    h, w = image.shape[:2]
+    scale = max_edge / max(h, w)
+    if scale >= 1:
+        return image
+    return cv2.resize(image, (int(w * scale), int(h * scale)), interpolation=cv2.INTER_AREA)
+
+
+def text_region(gray):
+    """Bounding box (x, y, w, h) around text-like blobs, or None."""
+    kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (3, 3))
+    gradient = cv2.morphologyEx(gray, cv2.MORPH_GRADIENT, kernel)
+    _, binary = cv2.threshold(gradient, 0, 255, cv2.THRESH_BINARY | cv2.THRESH_OTSU)
+    # Join characters into words/lines
+    joined = cv2.morphologyEx(binary, cv2.MORPH_CLOSE,
+                              cv2.getStructuringElement(cv2.MORPH_RECT, (15, 3)))
+    contours, _ = cv2.findContours(joined, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+
+    boxes = []
+    for contour in contours:
+        x, y, w, h = cv2.boundingRect(contour)
+        # Skip specks (noise, JPEG artefacts); keep everything else so
+        # handwriting crossing ruled lines is never cropped away
+        if w * h >= 40:
+            boxes.append((x, y, x + w, y + h))
+    if not boxes:
+        return None
+    boxes = np.array(boxes)
+    x0, y0 = boxes[:, :2].min(axis=0)
+    x1, y1 = boxes[:, 2:].max(axis=0)
+    return int(x0), int(y0), int(x1 - x0), int(y1 - y0)
+
+
+def preprocess(path, max_edge=MAX_EDGE):
+    """Decode, downscale, grayscale and crop one image for OCR."""
+    gray = cv2.cvtColor(downscale(load_image(path), max_edge), cv2.COLOR_BGR2GRAY)
+    box = text_region(gray)
+    if box is None:
+        return gray
+    x, y, w, h = box
+    height, width = gray.shape
+    if w * h > 0.8 * width * height:
+        # Text fills the page; cropping would save little and risk clipping
+        return gray
+    x0, y0 = max(x - CROP_MARGIN, 0), max(y - CROP_MARGIN, 0)
+    x1, y1 = min(x + w + CROP_MARGIN, width), min(y + h + CROP_MARGIN, height)
+    return gray[y0:y1, x0:x1]
+
+
+def _longest_run(mask):
+    """Longest horizontal run of True in any row of a 2-D boolean mask."""
+    padded = np.zeros((mask.shape[0], mask.shape[1] + 2), dtype=np.int8)
+    padded[:, 1:-1] = mask
+    edges = np.diff(padded, axis=1)
+    starts = np.argwhere(edges == 1)
+    ends = np.argwhere(edges == -1)
+    if len(starts) == 0:
+        return 0
+    # argwhere is row-major, so starts and ends pair up in order
+    return int((ends[:, 1] - starts[:, 1]).max())
+
+
+def detect_script(gray, hint=None):
+    """'mr' for Devanagari, 'en' for Latin, decided from word shapes.
+
+    Devanagari words hang from a continuous headline (shirorekha): some row
+    in the upper half of the word is inked almost end to end, whereas Latin
+    letters always leave gaps. Falls back to `hint` (or 'en') when there are
+    too few words to vote.
+    """
+    flag = cv2.THRESH_BINARY_INV if gray.mean() >= 127 else cv2.THRESH_BINARY
+    _, ink = cv2.threshold(gray, 0, 255, flag | cv2.THRESH_OTSU)
+    words = cv2.morphologyEx(ink, cv2.MORPH_CLOSE,
+                             cv2.getStructuringElement(cv2.MORPH_RECT, (9, 3)))
+    contours, _ = cv2.findContours(words, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+
+    votes = headlines = 0
+    for contour in contours:
+        x, y, w, h = cv2.boundingRect(contour)
+        if h < 10 or w < 2 * h:
+            continue
+        votes += 1
+        upper = ink[y:y + (h + 1) // 2, x:x + w] > 0
+        if _longest_run(upper) >= 0.8 * w:
+            headlines += 1
+
+    if votes < 3:
+        return hint or 'en'
+    return 'mr' if headlines / votes >= 0.35 else 'en'
+
+
+def pad_to_canvas(images):
+    """readtext_batched needs equal sizes; pad with white instead of stretching."""
+    height = max(img.shape[0] for img in images)
+    width = max(img.shape[1] for img in images)
+    padded = []
+    for img in images:
+        canvas = np.full((height, width), 255, dtype=np.uint8)
+        canvas[:img.shape[0], :img.shape[1]] = img
+        padded.append(canvas)
+    return padded
+
+
+def ocr_images(pool, paths, hint=None, batch_size=4):
+    """OCR every image of one submission with the recognizer for its script.
+
+    Returns (texts, scripts), one entry per path, in input order.
+    """
+    hint = normalize_script(hint) if hint else None
+    images = [preprocess(p) for p in paths]
+    scripts = [detect_script(img, hint) for img in images]
+    texts = [""] * len(images)
+
+    for script in set(scripts):
+        idx = [i for i, s in enumerate(scripts) if s == script]
+        reader = pool.get(script)
+        if len(idx) == 1:
+            texts[idx[0]] = " ".join(reader.readtext(images[idx[0]], detail=0))
+            continue
+        batch = pad_to_canvas([images[i] for i in idx])
+        results = reader.readtext_batched(batch, detail=0, batch_size=batch_size)
+        for i, lines in zip(idx, results):
+            texts[i] = " ".join(lines)
+    return texts, scripts
@@ -0,0 +1,305 @@
+import os
+import io
+import csv
+import sys
+import json
+import math
+import time
+import wave
+import random
+import shutil
+import sqlite3
+import tempfile
+import argparse
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+# -----------------------------
+# Load test for the grievance app
+# -----------------------------
+# Synthetic villagers log in via /login and submit a configurable mix of
+# text / image / audio complaints to /predict while synthetic admins poll
+# /admin and /view_complaints. Reports throughput and p50/p95/p99 latency per
+# endpoint, and can fail the run when a latency budget is exceeded.
+#
+#   python load_test.py --url http://127.0.0.1:5000 --users 20 --duration 60
+#   python load_test.py --in-process --users 8 --requests 200 --max-p95 500
+#
+# --in-process drives app.test_client() threads instead of HTTP, so CI can
+# run it without starting a server. It runs in a temporary directory against
+# a copy of grievance.db (or --db / --csv), so the committed DB, CSV and
+# upload folders are never written. Against --url the complaints are really
+# stored by that server.
+BASE_DIR = os.path.abspath(os.path.dirname(__file__))
+DATASET = os.path.join(BASE_DIR, "..", "dataset_eng_marathi.csv")
+IMAGE_DIR = os.path.join(BASE_DIR, "static", "uploads")
+AUDIO_DIR = os.path.join(BASE_DIR, "static", "recordings")
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    k = max(0, math.ceil(pct / 100 * len(ordered)) - 1)
+    return ordered[k]
+
+
+def load_complaints(path=DATASET):
+    with open(path, encoding="utf-8") as f:
+        return list(csv.DictReader(f))
+
+
+def load_files(folder, exts):
+    if not os.path.isdir(folder):
+        return []
+    files = []
+    for name in sorted(os.listdir(folder)):
+        if name.lower().endswith(exts):
+            with open(os.path.join(folder, name), "rb") as f:
+                files.append((name, f.read()))
+    return files
+
+
+def synthetic_wav(seconds=3, rate=16000):
+    """A short tone padded with silence, for runs without recorded clips."""
+    buf = io.BytesIO()
+    with wave.open(buf, "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(rate)
+        frames = bytearray()
+        for i in range(seconds * rate):
+            voiced = rate // 2 <= i < (seconds - 1) * rate
+            sample = int(8000 * math.sin(2 * math.pi * 220 * i / rate)) if voiced else 0
+            frames += sample.to_bytes(2, "little", signed=True)
+        w.writeframes(bytes(frames))
+    return ("synthetic.wav", buf.getvalue())
+
+
+# -----------------------------
+# Transports
+# -----------------------------
+class HttpClient:
+    def __init__(self, url):
+        import requests
+        self.url = url.rstrip("/")
+        self.session = requests.Session()
+
+    def post(self, path, data, files=None):
+        files = {k: (name, io.BytesIO(body)) for k, (name, body) in (files or {}).items()}
+        r = self.session.post(self.url + path, data=data, files=files, allow_redirects=False)
+        return r.status_code
+
+    def get(self, path):
+        return self.session.get(self.url + path, allow_redirects=False).status_code
+
+
+class InProcessClient:
+    def __init__(self, app):
+        self.client = app.test_client()
+
+    def post(self, path, data, files=None):
+        data = dict(data)
+        for k, (name, body) in (files or {}).items():
+            data[k] = (io.BytesIO(body), name)
+        return self.client.post(path, data=data, content_type="multipart/form-data").status_code
+
+    def get(self, path):
+        return self.client.get(path).status_code
+
+
+# -----------------------------
+# Workload
+# -----------------------------
+class Recorder:
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def timed(self, endpoint, fn, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            status = fn(*args, **kwargs)
+            ok = status < 400
+        except Exception:
+            ok = False
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            self.latencies[endpoint].append(elapsed)
+            if not ok:
+                self.errors[endpoint] += 1
+
+
+def run_user(make_client, recorder, args, complaints, images, audio, deadline, budget, user_no):
+    rng = random.Random(args.seed + user_no)
+    client = make_client()
+    is_admin = user_no < args.admins
+
+    if is_admin:
+        recorder.timed("/login", client.post, "/login",
+                       {"name": args.admin_user, "password": args.admin_password})
+    else:
+        recorder.timed("/login", client.post, "/login",
+                       {"name": f"loaduser{user_no}", "mobile": f"9{user_no:09d}"})
+
+    kinds = ["text", "image", "audio"]
+    weights = [args.text_weight, args.image_weight if images else 0, args.audio_weight]
+    while time.time() < deadline and budget.take():
+        if is_admin:
+            path = rng.choice(["/admin", "/view_complaints"])
+            recorder.timed(path, client.get, path)
+            continue
+
+        row = rng.choice(complaints)
+        form = {"full_name": f"Load User {user_no}", "village": row["Village"],
+                "pincode": row["Pincode"], "aadhar": "000000000000"}
+        kind = rng.choices(kinds, weights)[0]
+        if kind == "text":
+            form["complaint"] = row["Complaint_Text"]
+            recorder.timed("/predict[text]", client.post, "/predict", form)
+        elif kind == "image":
+            recorder.timed("/predict[image]", client.post, "/predict", form,
+                           {"image": rng.choice(images)})
+        else:
+            recorder.timed("/predict[audio]", client.post, "/predict", form,
+                           {"audio": rng.choice(audio)})
+
+        if args.think_ms:
+            time.sleep(rng.uniform(0, args.think_ms) / 1000)
+
+
+class RequestBudget:
+    """Optional cap on total requests shared by all users (None = unlimited)."""
+
+    def __init__(self, total):
+        self.remaining = total
+        self._lock = threading.Lock()
+
+    def take(self):
+        if self.remaining is None:
+            return True
+        with self._lock:
+            if self.remaining <= 0:
+                return False
+            self.remaining -= 1
+            return True
+
+
+def report(recorder, elapsed):
+    summary = {}
+    print(f"\n{'endpoint':18} {'reqs':>6} {'err':>5} {'rps':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for endpoint in sorted(recorder.latencies):
+        values = recorder.latencies[endpoint]
+        row = {
+            "requests": len(values),
+            "errors": recorder.errors[endpoint],
+            "rps": len(values) / elapsed,
+            "p50_ms": percentile(values, 50) * 1000,
+            "p95_ms": percentile(values, 95) * 1000,
+            "p99_ms": percentile(values, 99) * 1000,
+        }
+        summary[endpoint] = row
+        print(f"{endpoint:18} {row['requests']:6d} {row['errors']:5d} {row['rps']:7.1f} "
+              f"{row['p50_ms']:8.1f} {row['p95_ms']:8.1f} {row['p99_ms']:8.1f}")
+    total = sum(len(v) for v in recorder.latencies.values())
+    print(f"\n📊 {total} requests in {elapsed:.1f}s → {total / elapsed:.1f} req/s")
+    return summary
+
+
+def prepare_scratch(args):
+    """Point the in-process app at a temp dir: DB copy, CSV, sessions, uploads."""
+    scratch = tempfile.mkdtemp(prefix="grievance-load-")
+    db = args.db or os.path.join(scratch, "grievance.db")
+    source = os.path.join(BASE_DIR, "grievance.db")
+    if not args.db and os.path.isfile(source):
+        # backup() also copies pages still in the source's WAL
+        src, dst = sqlite3.connect(source), sqlite3.connect(db)
+        src.backup(dst)
+        src.close()
+        dst.close()
+    os.environ["GRIEVANCE_DB"] = db
+    os.environ["GRIEVANCE_CSV"] = args.csv or os.path.join(scratch, "complaints.csv")
+    os.environ["GRIEVANCE_SESSION_DB"] = os.path.join(scratch, "sessions.db")
+    os.environ.setdefault("ARCHIVE_DIR", os.path.join(scratch, "archive"))
+    os.chdir(scratch)  # static/uploads and static/recordings are relative to the cwd
+    print(f"🧪 In-process run in {scratch} (DB {db})")
+    return scratch
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load test the grievance app")
+    parser.add_argument("--url", default="http://127.0.0.1:5000")
+    parser.add_argument("--in-process", action="store_true", help="use app.test_client() instead of HTTP")
+    parser.add_argument("--db", help="--in-process: SQLite DB to use (default: a scratch copy of grievance.db)")
+    parser.add_argument("--csv", help="--in-process: complaints CSV to append to (default: scratch file)")
+    parser.add_argument("--keep-scratch", action="store_true", help="--in-process: keep the scratch directory")
+    parser.add_argument("--dataset", default=DATASET, help="CSV in the dataset_eng_marathi.csv schema")
+    parser.add_argument("--users", type=int, default=10)
+    parser.add_argument("--admins", type=int, default=1, help="how many of --users act as admins")
+    parser.add_argument("--duration", type=float, default=30, help="seconds")
+    parser.add_argument("--requests", type=int, default=None, help="stop after this many requests")
+    parser.add_argument("--text-weight", type=float, default=0.8)
+    parser.add_argument("--image-weight", type=float, default=0.1)
+    parser.add_argument("--audio-weight", type=float, default=0.1)
+    parser.add_argument("--think-ms", type=float, default=0)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--admin-user", default=os.getenv("ADMIN_USERNAME", "admin"))
+    parser.add_argument("--admin-password", default=os.getenv("ADMIN_PASSWORD", "admin123"))
+    parser.add_argument("--json", help="write the summary to this file")
+    parser.add_argument("--max-p95", type=float, help="fail if any endpoint's p95 exceeds this (ms)")
+    parser.add_argument("--max-error-rate", type=float, default=0.01)
+    args = parser.parse_args(argv)
+    # --in-process changes directory; resolve user paths first
+    for name in ("db", "csv", "json"):
+        if getattr(args, name):
+            setattr(args, name, os.path.abspath(getattr(args, name)))
+
+    complaints = load_complaints(args.dataset)
+    images = load_files(IMAGE_DIR, (".png", ".jpg", ".jpeg"))
+    audio = load_files(AUDIO_DIR, (".wav", ".mp3", ".m4a", ".ogg", ".webm")) or [synthetic_wav()]
+
+    scratch = None
+    if args.in_process:
+        scratch = prepare_scratch(args)
+        sys.path.insert(0, BASE_DIR)
+        from app import app
+        make_client = lambda: InProcessClient(app)
+    else:
+        make_client = lambda: HttpClient(args.url)
+
+    recorder = Recorder()
+    budget = RequestBudget(args.requests)
+    print(f"🚀 {args.users} users ({args.admins} admin) for up to {args.duration:.0f}s "
+          f"against {'in-process app' if args.in_process else args.url}")
+    start = time.time()
+    deadline = start + args.duration
+    with ThreadPoolExecutor(max_workers=args.users) as pool:
+        futures = [pool.submit(run_user, make_client, recorder, args, complaints,
+                               images, audio, deadline, budget, i)
+                   for i in range(args.users)]
+        for future in futures:
+            future.result()
+    summary = report(recorder, time.time() - start)
+    if scratch and not args.keep_scratch:
+        os.chdir(BASE_DIR)
+        shutil.rmtree(scratch, ignore_errors=True)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2)
+
+    failed = False
+    for endpoint, row in summary.items():
+        if args.max_p95 is not None and row["p95_ms"] > args.max_p95:
+            print(f"❌ {endpoint} p95 {row['p95_ms']:.1f}ms > {args.max_p95:.1f}ms")
+            failed = True
+        if row["errors"] / row["requests"] > args.max_error_rate:
+            print(f"❌ {endpoint} error rate {row['errors'] / row['requests']:.1%}")
+            failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
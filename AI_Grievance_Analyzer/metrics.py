@@ -0,0 +1,161 @@
+import os
+import time
+import bisect
+import functools
+import random
+import threading
+from contextlib import contextmanager
+
+# -----------------------------
+# In-process metrics
+# -----------------------------
+# Cheap per-stage timers feeding fixed-bucket histograms, rendered in the
+# Prometheus text format by /metrics. A timer is two perf_counter() calls
+# plus a bisect under a lock, so it is safe to leave on in production.
+# Counts are per worker process (each worker exposes its own series).
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+                   1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class Histogram:
+    def __init__(self, name, help_text, label, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label = label
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, label_value, seconds):
+        with self._lock:
+            series = self._series.get(label_value)
+            if series is None:
+                series = self._series[label_value] = [[0] * len(self.buckets), 0.0, 0]
+            i = bisect.bisect_left(self.buckets, seconds)
+            if i < len(self.buckets):
+                series[0][i] += 1
+            series[1] += seconds
+            series[2] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            snapshot = {k: (list(v[0]), v[1], v[2]) for k, v in self._series.items()}
+        for value, (counts, total, n) in sorted(snapshot.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{{{self.label}="{value}",le="{bound}"}} {cumulative}')
+            lines.append(f'{self.name}_bucket{{{self.label}="{value}",le="+Inf"}} {n}')
+            lines.append(f'{self.name}_sum{{{self.label}="{value}"}} {total:.6f}')
+            lines.append(f'{self.name}_count{{{self.label}="{value}"}} {n}')
+        return lines
+
+
+REQUEST_SECONDS = Histogram("grievance_http_request_seconds",
+                            "Request latency by endpoint.", "endpoint")
+STAGE_SECONDS = Histogram("grievance_predict_stage_seconds",
+                          "Latency of each /predict stage.", "stage")
+
+# Extra gauges: name -> (help, callable returning {label_value: number} or a number)
+_gauges = {}
+# Histograms defined by other modules (e.g. the scheduler's queue wait)
+_histograms = []
+
+
+def register_gauge(name, help_text, fn, label=None):
+    _gauges[name] = (help_text, fn, label)
+
+
+def register_histogram(histogram):
+    _histograms.append(histogram)
+
+
+@contextmanager
+def stage(name):
+    """Time a block of /predict, e.g. `with stage("ocr"): ...`."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_SECONDS.observe(name, time.perf_counter() - start)
+
+
+def timed(name):
+    """Decorator form of stage()."""
+    def wrap(fn):
+        @functools.wraps(fn)
+        def inner(*args, **kwargs):
+            with stage(name):
+                return fn(*args, **kwargs)
+        return inner
+    return wrap
+
+
+def render_metrics():
+    lines = REQUEST_SECONDS.render() + STAGE_SECONDS.render()
+    for histogram in _histograms:
+        lines += histogram.render()
+    for name, (help_text, fn, label) in sorted(_gauges.items()):
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} gauge"]
+        try:
+            value = fn()
+        except Exception:
+            continue
+        if isinstance(value, dict):
+            for key, v in sorted(value.items()):
+                lines.append(f'{name}{{{label}="{key}"}} {v}')
+        else:
+            lines.append(f"{name} {value}")
+    return "\n".join(lines) + "\n"
+
+
+# -----------------------------
+# Optional per-request profiling
+# -----------------------------
+# A request is profiled when it sends `X-Profile: <PROFILE_TOKEN>` or is
+# picked by PROFILE_SAMPLE_RATE (0..1). Uses pyinstrument when installed,
+# else cProfile; reports land in PROFILE_DIR.
+PROFILE_TOKEN = os.getenv("PROFILE_TOKEN", "")
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+
+
+def should_profile(header_value):
+    if PROFILE_TOKEN and header_value == PROFILE_TOKEN:
+        return True
+    return PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE
+
+
+class RequestProfiler:
+    def __init__(self):
+        try:
+            from pyinstrument import Profiler
+            self._profiler = Profiler()
+            self.kind = "pyinstrument"
+        except ImportError:
+            import cProfile
+            self._profiler = cProfile.Profile()
+            self.kind = "cprofile"
+
+    def start(self):
+        if self.kind == "pyinstrument":
+            self._profiler.start()
+        else:
+            self._profiler.enable()
+
+    def stop(self, endpoint):
+        """Stop profiling and write the report; returns its path."""
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        stamp = time.strftime("%Y%m%d-%H%M%S")
+        base = os.path.join(PROFILE_DIR, f"{endpoint}-{stamp}-{os.getpid()}")
+        if self.kind == "pyinstrument":
+            self._profiler.stop()
+            path = base + ".html"
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(self._profiler.output_html())
+        else:
+            self._profiler.disable()
+            path = base + ".prof"
+            self._profiler.dump_stats(path)
+        return path
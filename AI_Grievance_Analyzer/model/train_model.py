@@ -4,6 +4,11 @@ from sklearn.naive_bayes import MultinomialNB
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import classification_report
 import joblib
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from artifact import export_artifact, load_artifact, check_parity
 
 # Load dataset
 data = pd.read_csv("dataset/grievances1.csv")
@@ -37,3 +42,8 @@ print("Classification Report:\n", classification_report(y_test, y_pred))
 joblib.dump(vectorizer, "vectorizer.pkl")
 joblib.dump(model, "grievance_model.pkl")
 print("✅ Model and vectorizer saved!")
+
+# Compact mmap-able artifact used by app.py at serve time
+export_artifact(vectorizer, model)
+check_parity(vectorizer, model, load_artifact(), X.astype(str).tolist())
+print("✅ Artifact predictions match sklearn")
@@ -0,0 +1,57 @@
+import threading
+import easyocr
+
+# -----------------------------
+# Shared EasyOCR reader pool
+# -----------------------------
+# A pool of recognizers keyed by script. Readers are created on first use,
+# and every reader after the first borrows the first one's CRAFT detector
+# instead of loading its own, so Marathi adds only the Devanagari recognizer.
+# The pool is per process: with half the dataset in Marathi, every worker
+# that keeps its own pool soon holds both recognizers. Multi-worker
+# deployments run one pool for the host in ocr_service.py instead.
+SCRIPT_LANGS = {
+    "en": ["en"],
+    "mr": ["mr", "en"],  # Devanagari model also reads embedded English words
+}
+# Whisper / client language codes written in Devanagari
+DEVANAGARI_LANGS = {"mr", "hi", "ne", "sa"}
+
+
+def normalize_script(lang):
+    """Map any language hint (form value, Whisper code) to a SCRIPT_LANGS key."""
+    return "mr" if (lang or "").strip().lower() in DEVANAGARI_LANGS else "en"
+
+
+class ReaderPool:
+    def __init__(self, gpu=False):
+        self.gpu = gpu
+        self._readers = {}
+        self._lock = threading.Lock()
+
+    def get(self, script):
+        # Only 'en' / 'mr' ever get a reader, whatever hint the client sent
+        script = normalize_script(script)
+        reader = self._readers.get(script)
+        if reader is not None:
+            return reader
+        with self._lock:
+            if script not in self._readers:
+                self._readers[script] = self._load(script)
+            return self._readers[script]
+
+    def _load(self, script):
+        langs = SCRIPT_LANGS[script]
+        donor = next(iter(self._readers.values()), None)
+        if donor is None:
+            reader = easyocr.Reader(langs, gpu=self.gpu)
+        else:
+            reader = easyocr.Reader(langs, gpu=self.gpu, detector=False)
+            reader.detector = donor.detector
+            reader.detect_network = donor.detect_network
+            reader.get_textbox = donor.get_textbox
+        print(f"🔤 OCR recognizer loaded for '{script}' ({', '.join(langs)})")
+        return reader
+
+    def loaded(self):
+        return sorted(self._readers)
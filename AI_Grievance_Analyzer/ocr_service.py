@@ -0,0 +1,87 @@
+import os
+import threading
+from multiprocessing.connection import Client, Listener, AuthenticationError
+
+import image_preprocess
+from ocr_readers import ReaderPool
+
+# -----------------------------
+# Shared OCR process
+# -----------------------------
+# With several Flask / ASGI workers, each one holding its own ReaderPool ends
+# up with both recognizers (and a detector) once it has seen an English and
+# a Marathi image. `python ocr_service.py` runs a single ReaderPool for the
+# whole host instead: workers started with OCR_SERVICE_ADDRESS set send the
+# upload paths of a submission here and get (texts, scripts) back, so each
+# model is loaded once however many workers there are. Workers and service
+# must share the upload directory (same host).
+OCR_SERVICE_ADDRESS = os.getenv("OCR_SERVICE_ADDRESS", "")  # e.g. 127.0.0.1:6001
+OCR_SERVICE_AUTHKEY = os.getenv("OCR_SERVICE_AUTHKEY", "grievance-ocr").encode("utf-8")
+OCR_SERVICE_TIMEOUT = float(os.getenv("OCR_SERVICE_TIMEOUT", "120"))
+
+
+class OcrServiceUnavailable(ConnectionError):
+    """The OCR service could not be reached or did not answer in time."""
+
+
+def parse_address(value):
+    host, _, port = value.rpartition(":")
+    return host or "127.0.0.1", int(port)
+
+
+def ocr_remote(paths, hint=None, address=OCR_SERVICE_ADDRESS, timeout=OCR_SERVICE_TIMEOUT):
+    """image_preprocess.ocr_images() run by the OCR service; returns (texts, scripts)."""
+    try:
+        conn = Client(parse_address(address), authkey=OCR_SERVICE_AUTHKEY)
+    except (OSError, AuthenticationError) as e:
+        raise OcrServiceUnavailable(f"OCR service at {address} unreachable: {e}") from e
+    with conn:
+        conn.send(([os.path.abspath(p) for p in paths], hint))
+        if not conn.poll(timeout):
+            raise OcrServiceUnavailable(f"OCR service at {address} timed out after {timeout}s")
+        try:
+            status, payload = conn.recv()
+        except EOFError as e:
+            raise OcrServiceUnavailable(f"OCR service at {address} closed the connection") from e
+    if status == "error":
+        raise RuntimeError(f"OCR service: {payload}")
+    return payload
+
+
+def _handle(pool, conn):
+    with conn:
+        try:
+            paths, hint = conn.recv()
+        except EOFError:
+            return
+        try:
+            result = ("ok", image_preprocess.ocr_images(pool, paths, hint=hint))
+        except Exception as e:
+            result = ("error", f"{type(e).__name__}: {e}")
+        try:
+            conn.send(result)
+        except OSError:
+            pass  # client gave up (timeout)
+
+
+def serve(address, gpu=False):
+    """Answer ocr_remote() calls, one thread per request, from one ReaderPool."""
+    pool = ReaderPool(gpu=gpu)
+    with Listener(parse_address(address), authkey=OCR_SERVICE_AUTHKEY) as listener:
+        print(f"🔤 OCR service listening on {address}")
+        while True:
+            try:
+                conn = listener.accept()
+            except (OSError, AuthenticationError) as e:
+                print("⚠️ OCR service rejected a connection:", e)
+                continue
+            threading.Thread(target=_handle, args=(pool, conn), daemon=True).start()
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Serve OCR for all workers from one process")
+    parser.add_argument("--address", default=OCR_SERVICE_ADDRESS or "127.0.0.1:6001")
+    parser.add_argument("--gpu", action="store_true")
+    args = parser.parse_args()
+    serve(args.address, gpu=args.gpu)
@@ -0,0 +1,134 @@
+import os
+import re
+import json
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+
+# -----------------------------
+# Prediction result cache
+# -----------------------------
+# Many text complaints are near-verbatim repeats, so /predict keeps a bounded
+# LRU of normalized text → (department, probabilities). Keys are scoped by the
+# model artifact version, so exporting a new model invalidates old entries.
+# If REDIS_URL is set and reachable the cache is shared across workers too.
+CACHE_SIZE = int(os.getenv("PREDICTION_CACHE_SIZE", "4096"))
+CACHE_TTL = int(os.getenv("PREDICTION_CACHE_TTL", "86400"))  # seconds, Redis only
+
+_NON_WORD = re.compile(r"[^\w]+")
+
+
+def normalize_text(text):
+    # The vectorizer lowercases and only keeps \w tokens, so punctuation and
+    # whitespace differences never change the prediction.
+    return _NON_WORD.sub(" ", text.lower()).strip()
+
+
+def _connect_redis(url):
+    if not url:
+        return None
+    try:
+        import redis
+        client = redis.Redis.from_url(url, socket_timeout=0.05, socket_connect_timeout=0.2)
+        client.ping()
+        return client
+    except Exception as e:
+        print("⚠️ Redis prediction cache unavailable, using in-process LRU only:", e)
+        return None
+
+
+class PredictionCache:
+    def __init__(self, version, maxsize=CACHE_SIZE, redis_url=None, ttl=CACHE_TTL):
+        self.version = version
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._redis = _connect_redis(redis_url)
+
+        self.hits = 0
+        self.misses = 0
+        self.redis_hits = 0
+        self.saved_seconds = 0.0
+        self._avg_miss_seconds = 0.0
+
+    def set_version(self, version):
+        """Drop every local entry when the model artifact changes."""
+        with self._lock:
+            if version != self.version:
+                self._entries.clear()
+                self.version = version
+
+    def _redis_key(self, key):
+        digest = hashlib.sha1(key.encode("utf-8")).hexdigest()
+        return f"grievance:pred:{self.version}:{digest}"
+
+    def get(self, key):
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+        if value is None and self._redis is not None:
+            try:
+                raw = self._redis.get(self._redis_key(key))
+            except Exception:
+                raw = None
+            if raw is not None:
+                department, probabilities = json.loads(raw)
+                value = (department, probabilities)
+                self._store_local(key, value)
+                with self._lock:
+                    self.redis_hits += 1
+        return value
+
+    def _store_local(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def put(self, key, value):
+        self._store_local(key, value)
+        if self._redis is not None:
+            try:
+                self._redis.set(self._redis_key(key), json.dumps(value), ex=self.ttl)
+            except Exception:
+                pass
+
+    def get_or_compute(self, text, compute):
+        """Return compute(text) for `text`, served from the cache when possible."""
+        key = normalize_text(text)
+        value = self.get(key)
+        if value is not None:
+            with self._lock:
+                self.hits += 1
+                self.saved_seconds += self._avg_miss_seconds
+            return value
+
+        start = time.perf_counter()
+        value = compute(text)
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            self.misses += 1
+            # Running mean of the classifier cost, credited to each later hit
+            self._avg_miss_seconds += (elapsed - self._avg_miss_seconds) / self.misses
+        self.put(key, value)
+        return value
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "version": self.version,
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "shared": self._redis is not None,
+                "hits": self.hits,
+                "redis_hits": self.redis_hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "avg_miss_ms": round(self._avg_miss_seconds * 1000, 3),
+                "latency_saved_ms": round(self.saved_seconds * 1000, 3),
+            }
@@ -0,0 +1,227 @@
+import os
+import re
+import json
+import time
+import threading
+import urllib.request
+from collections import deque
+from concurrent.futures import Future
+
+import metrics
+
+# -----------------------------
+# Complaint priority
+# -----------------------------
+# The rules of process_complaints.reassess_priority(), applied to each
+# complaint as it is ingested. The classifier predicts departments
+# (Water Supply, Healthcare, ...), so they are first mapped back to the
+# dataset categories the rules were written for.
+PRIORITIES = ("High", "Medium", "Low")
+
+DEPARTMENT_CATEGORY = {
+    "Water Supply": "Water",
+    "Electricity": "Electricity",
+    "Healthcare": "Health",
+    "Sanitation": "Sanitation",
+    "Public Works": "Road",
+}
+
+# Bilingual patterns for the issues the rules single out
+ISSUE_PATTERNS = {
+    "doctor_not_available": [r"no doctor", r"doctor.*not available", r"डॉक्टर उपलब्ध नाही"],
+    "ambulance_not_arrived": [r"ambulance", r"अॅम्ब्युलन्स"],
+    "drainage_problem": [r"drainage", r"gutter", r"नाल्यांची स्वच्छता"],
+    "medicines_not_available": [r"medicines? (are )?not available", r"औषधे उपलब्ध नाहीत"],
+    "health_worker_absent": [r"health worker", r"आरोग्य कर्मचारी"],
+    "health_camp_needed": [r"health camp", r"आरोग्य शिबीर"],
+    "garbage_not_collected": [r"garbage", r"dustbin", r"कचरा"],
+    "road_potholes": [r"pothole", r"road is damaged", r"खड्डे"],
+    "new_road_required": [r"new road", r"नवीन रस्ता"],
+    "amenity": [r"library", r"playground", r"streetlight", r"park", r"ग्रंथालय", r"प्लेग्राउंड", r"स्ट्रीटलाइट"],
+}
+
+
+def detect_issue(text):
+    text = (text or "").lower()
+    for issue, patterns in ISSUE_PATTERNS.items():
+        if any(re.search(p, text) for p in patterns):
+            return issue
+    return "other_issue"
+
+
+def assess_priority(department, text, default="Medium"):
+    """'High' / 'Medium' / 'Low' for a classified complaint."""
+    category = DEPARTMENT_CATEGORY.get(department, department or "")
+    issue = detect_issue(text)
+
+    # HIGH: critical infrastructure and emergencies
+    if (category in ("Water", "Electricity") or
+            (category == "Health" and issue in ("doctor_not_available", "ambulance_not_arrived")) or
+            (category == "Sanitation" and issue == "drainage_problem")):
+        return "High"
+
+    # MEDIUM: daily inconveniences
+    if ((category == "Health" and issue in ("medicines_not_available", "health_worker_absent")) or
+            (category == "Sanitation" and issue == "garbage_not_collected") or
+            (category == "Road" and issue == "road_potholes")):
+        return "Medium"
+
+    # LOW: amenities, requests and administrative issues
+    if (category in ("Others", "Education", "Administrative") or
+            issue in ("health_camp_needed", "new_road_required", "amenity")):
+        return "Low"
+
+    return default
+
+
+def hint_priority(category):
+    """Provisional priority from the optional issue type picked on the form,
+    used for OCR / transcription before the text has been classified."""
+    return assess_priority(category, "") if category else "Medium"
+
+
+def backfill_priority(conn):
+    """Fill `priority` for complaints stored before the column existed."""
+    rows = conn.execute(
+        "SELECT id, department, complaint_text FROM complaints WHERE priority IS NULL"
+    ).fetchall()
+    conn.executemany("UPDATE complaints SET priority = ? WHERE id = ?",
+                     [(assess_priority(dept, text), cid) for cid, dept, text in rows])
+    conn.commit()
+    return len(rows)
+
+
+# -----------------------------
+# Priority scheduler
+# -----------------------------
+# Expensive stages (OCR, Whisper, department notifications) are queued per
+# priority and drained by a fixed set of worker threads, so a burst of
+# low-priority complaints cannot hold up an emergency behind it. Waiting
+# jobs age: every PRIORITY_AGING_SECONDS in the queue counts as one level
+# up, so Low work is still served under a sustained stream of High work.
+# Each level holds at most SCHEDULER_MAX_QUEUE waiting jobs; beyond that
+# submit() raises QueueFull (a 503 for the request), and since the cap is
+# per level a flood of Low work never takes the room High work needs.
+SCHEDULER_WORKERS = int(os.getenv("SCHEDULER_WORKERS", str(min(4, os.cpu_count() or 1))))
+PRIORITY_AGING_SECONDS = float(os.getenv("PRIORITY_AGING_SECONDS", "30"))
+SCHEDULER_MAX_QUEUE = int(os.getenv("SCHEDULER_MAX_QUEUE", "64"))
+
+QUEUE_WAIT_SECONDS = metrics.Histogram("grievance_scheduler_wait_seconds",
+                                       "Time jobs spent queued, by priority.", "priority")
+
+
+class QueueFull(RuntimeError):
+    """The scheduler queue for this priority is at SCHEDULER_MAX_QUEUE."""
+
+
+class PriorityScheduler:
+    def __init__(self, workers=SCHEDULER_WORKERS, aging_seconds=PRIORITY_AGING_SECONDS,
+                 max_queue=SCHEDULER_MAX_QUEUE):
+        self.aging_seconds = aging_seconds
+        self.max_queue = max_queue
+        self._queues = {p: deque() for p in PRIORITIES}
+        self._cond = threading.Condition()
+        self._closed = False
+        self._threads = [threading.Thread(target=self._work, name=f"scheduler-{i}", daemon=True)
+                         for i in range(workers)]
+        for t in self._threads:
+            t.start()
+
+    def submit(self, priority, fn, *args, **kwargs):
+        """Queue fn(*args, **kwargs); returns a concurrent.futures.Future.
+
+        Raises QueueFull when `priority` already has max_queue jobs waiting.
+        """
+        if priority not in self._queues:
+            priority = "Medium"
+        future = Future()
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("scheduler is shut down")
+            if len(self._queues[priority]) >= self.max_queue:
+                raise QueueFull(f"{priority} queue is full ({self.max_queue} waiting)")
+            self._queues[priority].append((time.monotonic(), future, fn, args, kwargs))
+            self._cond.notify()
+        return future
+
+    def run(self, priority, fn, *args, **kwargs):
+        """submit() and wait for the result (for the synchronous Flask handlers)."""
+        return self.submit(priority, fn, *args, **kwargs).result()
+
+    def depth(self):
+        with self._cond:
+            return {p: len(q) for p, q in self._queues.items()}
+
+    def shutdown(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def _pick(self, now):
+        # Only queue heads compete: each is the oldest job of its level
+        best = None
+        for rank, priority in enumerate(PRIORITIES):
+            queue = self._queues[priority]
+            if queue:
+                enqueued = queue[0][0]
+                key = (rank - (now - enqueued) / self.aging_seconds, enqueued)
+                if best is None or key < best[0]:
+                    best = (key, priority)
+        return best and best[1]
+
+    def _work(self):
+        while True:
+            with self._cond:
+                while not self._closed and not any(self._queues.values()):
+                    self._cond.wait()
+                if self._closed:
+                    return
+                now = time.monotonic()
+                priority = self._pick(now)
+                enqueued, future, fn, args, kwargs = self._queues[priority].popleft()
+            QUEUE_WAIT_SECONDS.observe(priority, now - enqueued)
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                future.set_result(fn(*args, **kwargs))
+            except BaseException as e:
+                future.set_exception(e)
+
+
+scheduler = PriorityScheduler()
+metrics.register_histogram(QUEUE_WAIT_SECONDS)
+metrics.register_gauge("grievance_scheduler_queue_depth", "Jobs waiting in the scheduler, by priority.",
+                       scheduler.depth, label="priority")
+
+
+# -----------------------------
+# Department notifications
+# -----------------------------
+# POSTs each stored complaint to NOTIFY_WEBHOOK_URL (if set) through the
+# scheduler, so High complaints reach departments first under load.
+NOTIFY_WEBHOOK_URL = os.getenv("NOTIFY_WEBHOOK_URL", "")
+
+
+def _post_notification(payload):
+    req = urllib.request.Request(NOTIFY_WEBHOOK_URL, data=json.dumps(payload).encode("utf-8"),
+                                 headers={"Content-Type": "application/json"})
+    with metrics.stage("notify"):
+        try:
+            urllib.request.urlopen(req, timeout=5).close()
+        except Exception as e:
+            print("⚠️ Department notification failed:", e)
+
+
+def notify_department(complaint_id, department, priority, village, pincode, text):
+    """Queue the routing notification; returns immediately."""
+    if not NOTIFY_WEBHOOK_URL:
+        return None
+    try:
+        return scheduler.submit(priority, _post_notification, {
+            "id": complaint_id, "department": department, "priority": priority,
+            "village": village, "pincode": pincode, "complaint": text[:500],
+        })
+    except QueueFull as e:
+        # The complaint is already stored; departments also see it on the dashboard
+        print("⚠️ Department notification dropped:", e)
+        return None
@@ -0,0 +1,133 @@
+import re
+import sqlite3
+
+# -----------------------------
+# Full-text search over complaints
+# -----------------------------
+# complaints_fts is an external-content FTS5 index over
+# complaints.complaint_text, kept in sync by triggers. The stock unicode61
+# tokenizer splits Devanagari words at every vowel sign / virama, so those
+# combining marks are declared as token characters.
+DEVANAGARI_MARKS = "".join(
+    chr(c) for c in range(0x0900, 0x0980)
+    if not chr(c).isalpha() and chr(c) not in "।॥"  # keep danda as a separator
+)
+
+FTS_SCHEMA = f"""
+CREATE VIRTUAL TABLE IF NOT EXISTS complaints_fts USING fts5(
+    complaint_text,
+    content='complaints',
+    content_rowid='id',
+    tokenize="unicode61 remove_diacritics 2 tokenchars '{DEVANAGARI_MARKS}'"
+);
+
+CREATE TRIGGER IF NOT EXISTS trg_complaints_fts_insert
+AFTER INSERT ON complaints
+BEGIN
+    INSERT INTO complaints_fts (rowid, complaint_text) VALUES (NEW.id, NEW.complaint_text);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_complaints_fts_delete
+AFTER DELETE ON complaints
+BEGIN
+    INSERT INTO complaints_fts (complaints_fts, rowid, complaint_text)
+    VALUES ('delete', OLD.id, OLD.complaint_text);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_complaints_fts_update
+AFTER UPDATE OF complaint_text ON complaints
+BEGIN
+    INSERT INTO complaints_fts (complaints_fts, rowid, complaint_text)
+    VALUES ('delete', OLD.id, OLD.complaint_text);
+    INSERT INTO complaints_fts (rowid, complaint_text) VALUES (NEW.id, NEW.complaint_text);
+END;
+"""
+
+_WORD = re.compile(r"[\w" + DEVANAGARI_MARKS + r"]+\*?")
+
+
+def init_search(conn):
+    """Create the FTS index + triggers, building it from existing rows once."""
+    exists = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE name='complaints_fts'"
+    ).fetchone()
+    conn.executescript(FTS_SCHEMA)
+    if not exists:
+        conn.execute("INSERT INTO complaints_fts (complaints_fts) VALUES ('rebuild')")
+        conn.commit()
+
+
+def to_match_query(text):
+    """Turn free text into a safe FTS5 query: every word must match, 'wat*' is a prefix."""
+    terms = []
+    for word in _WORD.findall(text):
+        prefix = word.endswith("*")
+        word = word.rstrip("*")
+        if word:
+            terms.append(f'"{word}"' + ("*" if prefix else ""))
+    return " ".join(terms)
+
+
+SEARCH_COLUMNS = ["id", "full_name", "village", "pincode", "department", "timestamp",
+                  "snippet", "rank"]
+
+
+def search_queries(text, department=None, date_from=None, date_to=None,
+                   page=1, per_page=20):
+    """(count_sql, page_sql, params, page_params), or None for an empty query."""
+    match = to_match_query(text)
+    if not match:
+        return None
+
+    where, params = ["complaints_fts MATCH ?"], [match]
+    if department:
+        where.append("c.department = ?")
+        params.append(department)
+    if date_from:
+        where.append("c.timestamp >= ?")
+        params.append(date_from)
+    if date_to:
+        # Dates are inclusive; timestamps are 'YYYY-MM-DD HH:MM:SS'
+        where.append("c.timestamp < date(?, '+1 day')")
+        params.append(date_to)
+    clause = " AND ".join(where)
+
+    count_sql = f"""
+        SELECT COUNT(*) FROM complaints_fts
+        JOIN complaints c ON c.id = complaints_fts.rowid
+        WHERE {clause}
+    """
+    page_sql = f"""
+        SELECT c.id, c.full_name, c.village, c.pincode, c.department, c.timestamp,
+               snippet(complaints_fts, 0, '[', ']', '…', 16) AS snippet,
+               bm25(complaints_fts) AS rank
+        FROM complaints_fts
+        JOIN complaints c ON c.id = complaints_fts.rowid
+        WHERE {clause}
+        ORDER BY rank
+        LIMIT ? OFFSET ?
+    """
+    return count_sql, page_sql, params, params + [per_page, (page - 1) * per_page]
+
+
+def search_complaints(conn, text, department=None, date_from=None, date_to=None,
+                      page=1, per_page=20):
+    """Ranked (bm25) page of complaints matching `text`, plus the total hit count."""
+    queries = search_queries(text, department, date_from, date_to, page, per_page)
+    if queries is None:
+        return [], 0
+    count_sql, page_sql, params, page_params = queries
+    total = conn.execute(count_sql, params).fetchone()[0]
+    rows = conn.execute(page_sql, page_params).fetchall()
+    return [dict(zip(SEARCH_COLUMNS, row)) for row in rows], total
+
+
+if __name__ == "__main__":
+    import sys
+    conn = sqlite3.connect("grievance.db")
+    init_search(conn)
+    results, total = search_complaints(conn, " ".join(sys.argv[1:]) or "water")
+    print(f"🔎 {total} matches")
+    for row in results:
+        print(f"   {row['timestamp']}  {row['department']:15} {row['snippet']}")
+    conn.close()
@@ -0,0 +1,156 @@
+import os
+import json
+import time
+import sqlite3
+import secrets
+import threading
+from flask.sessions import SessionInterface, SessionMixin
+from werkzeug.datastructures import CallbackDict
+
+# -----------------------------
+# Server-side sessions
+# -----------------------------
+# The cookie only carries a random session id; the session dict lives in
+# Redis (REDIS_URL, shared by all workers) or, when Redis is unreachable, in
+# a small SQLite database next to the app. Cookies stay tiny no matter what
+# the session holds, and there is no per-request payload signing.
+SESSION_LIFETIME = int(os.getenv("SESSION_LIFETIME", str(7 * 24 * 3600)))  # seconds
+
+
+class ServerSession(CallbackDict, SessionMixin):
+    def __init__(self, initial=None, sid=None, new=False):
+        def on_update(self):
+            self.modified = True
+        super().__init__(initial, on_update)
+        self.sid = sid
+        self.new = new
+        self.modified = False
+        self.replaced_sid = None
+
+    def rotate(self):
+        """New id on login so a session id planted before login is worthless."""
+        if not self.new:
+            self.replaced_sid = self.sid
+        self.sid = secrets.token_urlsafe(32)
+        self.new = True
+        self.modified = True
+
+
+class RedisStore:
+    def __init__(self, client, prefix="grievance:session:"):
+        self.client = client
+        self.prefix = prefix
+
+    def load(self, sid):
+        raw = self.client.get(self.prefix + sid)
+        return json.loads(raw) if raw else None
+
+    def save(self, sid, data, ttl):
+        self.client.set(self.prefix + sid, json.dumps(data), ex=ttl)
+
+    def delete(self, sid):
+        self.client.delete(self.prefix + sid)
+
+
+class SQLiteStore:
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        conn = self._conn()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS sessions (
+                sid TEXT PRIMARY KEY,
+                data TEXT NOT NULL,
+                expires REAL NOT NULL
+            )
+        """)
+        conn.execute("DELETE FROM sessions WHERE expires < ?", (time.time(),))
+        conn.commit()
+
+    def _conn(self):
+        # One connection per thread; the dev server and gunicorn threads each get theirs
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = sqlite3.connect(self.path)
+        return conn
+
+    def load(self, sid):
+        row = self._conn().execute(
+            "SELECT data FROM sessions WHERE sid = ? AND expires >= ?", (sid, time.time())
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def save(self, sid, data, ttl):
+        conn = self._conn()
+        conn.execute("""
+            INSERT INTO sessions (sid, data, expires) VALUES (?, ?, ?)
+            ON CONFLICT (sid) DO UPDATE SET data = excluded.data, expires = excluded.expires
+        """, (sid, json.dumps(data), time.time() + ttl))
+        conn.commit()
+
+    def delete(self, sid):
+        conn = self._conn()
+        conn.execute("DELETE FROM sessions WHERE sid = ?", (sid,))
+        conn.commit()
+
+
+def make_store(redis_url, sqlite_path):
+    if redis_url:
+        try:
+            import redis
+            client = redis.Redis.from_url(redis_url, socket_timeout=0.2, socket_connect_timeout=0.2)
+            client.ping()
+            print("🔐 Sessions stored in Redis")
+            return RedisStore(client)
+        except Exception as e:
+            print("⚠️ Redis session store unavailable, using SQLite:", e)
+    print("🔐 Sessions stored in", sqlite_path)
+    return SQLiteStore(sqlite_path)
+
+
+def open_server_session(interface, app, request):
+    """Shared by the Flask interface below and the Quart one in asgi_app.py."""
+    sid = request.cookies.get(interface.get_cookie_name(app))
+    if sid:
+        data = interface.store.load(sid)
+        if data is not None:
+            return ServerSession(data, sid=sid)
+    return ServerSession(sid=secrets.token_urlsafe(32), new=True)
+
+
+def save_server_session(interface, app, session, response):
+    name = interface.get_cookie_name(app)
+    domain = interface.get_cookie_domain(app)
+    path = interface.get_cookie_path(app)
+
+    if session.replaced_sid:
+        interface.store.delete(session.replaced_sid)
+
+    if not session:
+        if session.modified and not session.new:
+            interface.store.delete(session.sid)
+            response.delete_cookie(name, domain=domain, path=path)
+        return
+
+    if session.modified:
+        interface.store.save(session.sid, dict(session), interface.lifetime)
+    if session.new or session.modified:
+        response.set_cookie(name, session.sid,
+                            max_age=interface.lifetime,
+                            httponly=interface.get_cookie_httponly(app),
+                            secure=interface.get_cookie_secure(app),
+                            samesite=interface.get_cookie_samesite(app),
+                            domain=domain, path=path)
+
+
+class ServerSessionInterface(SessionInterface):
+    def __init__(self, store, lifetime=SESSION_LIFETIME):
+        self.store = store
+        self.lifetime = lifetime
+
+    def open_session(self, app, request):
+        return open_server_session(self, app, request)
+
+    def save_session(self, app, session, response):
+        save_server_session(self, app, session, response)
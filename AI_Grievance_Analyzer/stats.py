@@ -0,0 +1,171 @@
+import sqlite3
+from datetime import datetime, timedelta
+
+# -----------------------------
+# Materialized complaint rollups
+# -----------------------------
+# complaint_daily_counts holds one row per pincode × village × department ×
+# priority × day, kept up to date by triggers on `complaints`. Dashboard
+# queries read this table, so their cost depends on the number of
+# places/departments/days asked for, not on how many complaints have ever
+# been filed.
+ROLLUP_SCHEMA = """
+CREATE TABLE IF NOT EXISTS complaint_daily_counts (
+    pincode TEXT NOT NULL,
+    day TEXT NOT NULL,
+    village TEXT NOT NULL,
+    department TEXT NOT NULL,
+    priority TEXT NOT NULL DEFAULT '',
+    count INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (pincode, day, village, department, priority)
+) WITHOUT ROWID;
+
+CREATE INDEX IF NOT EXISTS idx_daily_counts_day
+    ON complaint_daily_counts (day, department);
+
+CREATE TRIGGER IF NOT EXISTS trg_complaints_rollup_insert
+AFTER INSERT ON complaints
+BEGIN
+    INSERT INTO complaint_daily_counts (pincode, day, village, department, priority, count)
+    VALUES (IFNULL(NEW.pincode, ''), substr(NEW.timestamp, 1, 10), IFNULL(NEW.village, ''),
+            IFNULL(NEW.department, ''), IFNULL(NEW.priority, ''), 1)
+    ON CONFLICT (pincode, day, village, department, priority) DO UPDATE SET count = count + 1;
+END;
+
+-- Archival (archive.py) moves rows out of `complaints` with this flag set
+-- inside its transaction, so archived complaints keep their counts.
+CREATE TABLE IF NOT EXISTS maintenance_flags (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE TRIGGER IF NOT EXISTS trg_complaints_rollup_delete
+AFTER DELETE ON complaints
+WHEN IFNULL((SELECT value FROM maintenance_flags WHERE name = 'archiving'), 0) = 0
+BEGIN
+    UPDATE complaint_daily_counts SET count = count - 1
+    WHERE pincode = IFNULL(OLD.pincode, '') AND day = substr(OLD.timestamp, 1, 10)
+      AND village = IFNULL(OLD.village, '') AND department = IFNULL(OLD.department, '')
+      AND priority = IFNULL(OLD.priority, '');
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_complaints_rollup_update
+AFTER UPDATE OF pincode, village, department, timestamp, priority ON complaints
+BEGIN
+    UPDATE complaint_daily_counts SET count = count - 1
+    WHERE pincode = IFNULL(OLD.pincode, '') AND day = substr(OLD.timestamp, 1, 10)
+      AND village = IFNULL(OLD.village, '') AND department = IFNULL(OLD.department, '')
+      AND priority = IFNULL(OLD.priority, '');
+    INSERT INTO complaint_daily_counts (pincode, day, village, department, priority, count)
+    VALUES (IFNULL(NEW.pincode, ''), substr(NEW.timestamp, 1, 10), IFNULL(NEW.village, ''),
+            IFNULL(NEW.department, ''), IFNULL(NEW.priority, ''), 1)
+    ON CONFLICT (pincode, day, village, department, priority) DO UPDATE SET count = count + 1;
+END;
+"""
+
+GROUP_COLUMNS = {"department", "village", "pincode", "day", "priority"}
+
+ROLLUP_TRIGGERS = ("trg_complaints_rollup_insert", "trg_complaints_rollup_delete",
+                   "trg_complaints_rollup_update")
+
+
+def init_stats(conn):
+    """Create the rollup table + triggers, backfilling from existing complaints once."""
+    columns = [row[1] for row in conn.execute("PRAGMA table_info(complaint_daily_counts)")]
+    # Older databases have the delete trigger without the archiving guard
+    conn.execute("DROP TRIGGER IF EXISTS trg_complaints_rollup_delete")
+    if columns and "priority" not in columns:
+        # Rollups from before the priority dimension: recreate and recount
+        for trigger in ROLLUP_TRIGGERS:
+            conn.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+        conn.execute("DROP TABLE complaint_daily_counts")
+        columns = []
+    conn.executescript(ROLLUP_SCHEMA)
+    if not columns:
+        rebuild_rollups(conn)
+
+
+def rebuild_rollups(conn):
+    """Recompute the rollup table from scratch (e.g. after a manual data fix).
+
+    Counts the hot table and every monthly archive listed in
+    complaint_archives (archive.py), so archived complaints keep their counts.
+    """
+    conn.execute("DELETE FROM complaint_daily_counts")
+    add_rollups(conn, "main")
+    has_archives = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type='table' AND name='complaint_archives'"
+    ).fetchone()
+    months = conn.execute("SELECT path FROM complaint_archives").fetchall() if has_archives else []
+    for (path,) in months:
+        conn.execute("ATTACH DATABASE ? AS arch", (path,))
+        try:
+            add_rollups(conn, "arch")
+        finally:
+            conn.commit()  # DETACH is refused while a transaction is open
+            conn.execute("DETACH DATABASE arch")
+    conn.commit()
+
+
+def add_rollups(conn, schema):
+    """Add the counts of `<schema>.complaints` (an attached database) to the rollups."""
+    # Archives written before complaints had a priority count as ''
+    columns = [row[1] for row in conn.execute(f"PRAGMA {schema}.table_info(complaints)")]
+    priority = "IFNULL(priority, '')" if "priority" in columns else "''"
+    conn.execute(f"""
+        INSERT INTO complaint_daily_counts (pincode, day, village, department, priority, count)
+        SELECT IFNULL(pincode, ''), substr(timestamp, 1, 10), IFNULL(village, ''),
+               IFNULL(department, ''), {priority}, COUNT(*)
+        FROM {schema}.complaints
+        WHERE 1
+        GROUP BY 1, 2, 3, 4, 5
+        ON CONFLICT (pincode, day, village, department, priority) DO UPDATE SET count = count + excluded.count
+    """)
+
+
+def stats_query(group_by="department", days=7, pincode=None, village=None,
+                department=None, limit=10, priority=None):
+    """(sql, params) for the top `group_by` values over the last `days` days."""
+    if group_by not in GROUP_COLUMNS:
+        raise ValueError(f"group_by must be one of {sorted(GROUP_COLUMNS)}")
+
+    since = (datetime.now() - timedelta(days=days - 1)).strftime("%Y-%m-%d")
+    where, params = ["day >= ?"], [since]
+    for column, value in (("pincode", pincode), ("village", village), ("department", department),
+                          ("priority", priority)):
+        if value:
+            where.append(f"{column} = ?")
+            params.append(value)
+
+    order = "day DESC" if group_by == "day" else "total DESC"
+    sql = f"""
+        SELECT {group_by}, SUM(count) AS total
+        FROM complaint_daily_counts
+        WHERE {' AND '.join(where)}
+        GROUP BY {group_by}
+        HAVING total > 0
+        ORDER BY {order}
+        LIMIT ?
+    """
+    return sql, params + [limit]
+
+
+def format_stats(group_by, rows):
+    return [{group_by: key, "count": total} for key, total in rows]
+
+
+def query_stats(conn, group_by="department", days=7, pincode=None, village=None,
+                department=None, limit=10, priority=None):
+    """Top `group_by` values by complaint count over the last `days` days."""
+    sql, params = stats_query(group_by, days, pincode, village, department, limit, priority)
+    return format_stats(group_by, conn.execute(sql, params).fetchall())
+
+
+if __name__ == "__main__":
+    import sys
+    db_path = sys.argv[1] if len(sys.argv) > 1 else "grievance.db"
+    conn = sqlite3.connect(db_path)
+    init_stats(conn)
+    rebuild_rollups(conn)
+    print("📊 Rollups rebuilt:", query_stats(conn, days=3650))
+    conn.close()
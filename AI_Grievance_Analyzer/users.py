@@ -0,0 +1,75 @@
+import os
+import threading
+from collections import OrderedDict
+
+# -----------------------------
+# User lookup for login
+# -----------------------------
+# Logins resolve (name, mobile) -> user id with one upsert on a unique index
+# instead of SELECT-then-INSERT on an unindexed table, and recently seen
+# users are answered from an in-process LRU without touching SQLite at all.
+USER_CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE", "50000"))
+
+UPSERT_USER_SQL = """
+    INSERT INTO users (name, mobile, role) VALUES (?, ?, 'user')
+    ON CONFLICT (name, mobile) DO UPDATE SET name = excluded.name
+    RETURNING id
+"""
+
+
+def init_users(conn):
+    """Merge duplicate (name, mobile) rows, then add the unique index the upsert needs."""
+    dupes = conn.execute("""
+        SELECT name, mobile, MIN(id) FROM users
+        GROUP BY name, mobile HAVING COUNT(*) > 1
+    """).fetchall()
+    for name, mobile, keep in dupes:
+        conn.execute("""
+            UPDATE complaints SET user_id = ?
+            WHERE user_id IN (SELECT id FROM users WHERE name = ? AND mobile = ? AND id != ?)
+        """, (keep, name, mobile, keep))
+        conn.execute("DELETE FROM users WHERE name = ? AND mobile = ? AND id != ?",
+                     (name, mobile, keep))
+    conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_users_name_mobile ON users (name, mobile)")
+    conn.commit()
+
+
+class UserCache:
+    def __init__(self, maxsize=USER_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            user_id = self._entries.get(key)
+            if user_id is None:
+                self.misses += 1
+            else:
+                self._entries.move_to_end(key)
+                self.hits += 1
+            return user_id
+
+    def put(self, key, user_id):
+        with self._lock:
+            self._entries[key] = user_id
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+user_cache = UserCache()
+
+
+def upsert_user(conn, name, mobile):
+    """User id for (name, mobile), creating the user on first login; fills the cache."""
+    user_id = conn.execute(UPSERT_USER_SQL, (name, mobile)).fetchone()[0]
+    conn.commit()
+    user_cache.put((name, mobile), user_id)
+    return user_id